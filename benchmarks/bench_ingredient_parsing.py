@@ -0,0 +1,147 @@
+"""Measure ingredient parsing cost apart from what deduplication saves.
+
+Each distinct line is parsed once per-sentence and once through prepare_recipes
+with an empty cache. This is the raw parsing cost, where the cache cannot help.
+Then a workload of --lines lines drawn with repeats from the same pool shows
+what deduplication within a batch and a warm cache save. Those savings depend
+on how often lines repeat, so measure them on real data where possible.
+
+fixtures/ingredient_lines.txt holds 267 real lines. --records reads the
+ingredient sentences from sample-recipes JSONL output instead, and --lines-file
+reads one line per row. --synthetic-variants adds copies of every line with a
+different leading quantity, a larger but synthetic pool; results are labelled.
+
+    python benchmarks/bench_ingredient_parsing.py --records data/samples.jsonl
+    python benchmarks/bench_ingredient_parsing.py --synthetic-variants
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from chorba.lib.markup import _schema_org
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ingredient_lines.txt"
+LEADING_QUANTITY = re.compile(r"^(\d+(?: \d+/\d+)?|\d+/\d+)(?= )")
+SINGULAR_QUANTITIES = ["1", "1/2", "1/3", "1/4", "2/3", "3/4", "1/8"]
+PLURAL_QUANTITIES = ["2", "3", "4", "6", "8", "12", "1 1/2", "2 1/2", "2 to 3"]
+
+
+def load_lines(lines_file: Path, records: Path | None) -> list[str]:
+    if records is None:
+        lines = lines_file.read_text(encoding="utf-8").splitlines()
+    else:
+        lines = []
+        with records.open(encoding="utf-8") as records_file:
+            for row in records_file:
+                recipe = json.loads(row).get("recipe") or {}
+                lines.extend(
+                    ingredient["sentence"]
+                    for ingredient in recipe.get("ingredients", [])
+                )
+    return list(dict.fromkeys(line.strip() for line in lines if line.strip()))
+
+
+def synthetic_variants(lines: list[str]) -> list[str]:
+    """Copies of ``lines`` with their leading quantity replaced."""
+    variants = []
+    for line in lines:
+        match = LEADING_QUANTITY.match(line)
+        if match is None:
+            continue
+        singular = match.group(1) == "1" or "/" in match.group(1).split()[0]
+        quantities = SINGULAR_QUANTITIES if singular else PLURAL_QUANTITIES
+        variants.extend(quantity + line[match.end() :] for quantity in quantities)
+    return variants
+
+
+def group(lines: list[str], lines_per_recipe: int) -> list[list[str]]:
+    return [
+        lines[index : index + lines_per_recipe]
+        for index in range(0, len(lines), lines_per_recipe)
+    ]
+
+
+def per_sentence(recipes: list[list[str]]) -> None:
+    for sentences in recipes:
+        for sentence in sentences:
+            try:
+                _schema_org._parse_ingredient_sentence(sentence)
+            except Exception:
+                pass
+
+
+def batched(recipes: list[list[str]]) -> None:
+    _schema_org.prepare_recipes(
+        _schema_org.Recipe({"recipeIngredient": sentences}) for sentences in recipes
+    )
+
+
+def report(name: str, recipes: list[list[str]], func, cache: bool) -> float:
+    total = sum(len(sentences) for sentences in recipes)
+    before = _schema_org.ingredient_cache_stats()
+    started = time.perf_counter()
+    func(recipes)
+    elapsed = time.perf_counter() - started
+
+    line = f"{name:>22}: {elapsed:.3f}s, {elapsed / total * 1e3:.3f} ms/line"
+    if cache:
+        stats = _schema_org.ingredient_cache_stats()
+        hits = stats.hits - before.hits
+        misses = stats.misses - before.misses
+        line += f" (cache hits={hits} misses={misses})"
+    print(line)
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines-file", type=Path, default=FIXTURE)
+    parser.add_argument("--records", type=Path)
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--lines-per-recipe", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--synthetic-variants", action="store_true")
+    args = parser.parse_args()
+
+    distinct = load_lines(args.lines_file, args.records)
+    if not distinct:
+        parser.error("no ingredient lines to parse")
+    source = f"{len(distinct)} real"
+    if args.synthetic_variants:
+        real = len(distinct)
+        distinct = list(dict.fromkeys(distinct + synthetic_variants(distinct)))
+        source += f" + {len(distinct) - real} synthetic"
+    rng = random.Random(args.seed)
+    rng.shuffle(distinct)
+    repeated = rng.choices(distinct, k=args.lines)
+    _schema_org.ensure_ingredient_parser_ready()
+    # Large enough that the warm run below finds every line it needs.
+    cache_size = max(len(distinct), _schema_org._INGREDIENT_CACHE_SIZE)
+
+    print(f"parse cost, {len(distinct)} distinct lines ({source})")
+    distinct_recipes = group(distinct, args.lines_per_recipe)
+    report("per-sentence", distinct_recipes, per_sentence, cache=False)
+    _schema_org.configure_ingredient_cache(maxsize=cache_size)
+    report("batched, cold cache", distinct_recipes, batched, cache=True)
+
+    unique = len(set(repeated))
+    print(f"dedup, {len(repeated)} lines with {unique} unique")
+    repeated_recipes = group(repeated, args.lines_per_recipe)
+    baseline = report("per-sentence", repeated_recipes, per_sentence, cache=False)
+    _schema_org.configure_ingredient_cache(maxsize=cache_size)
+    cold = report("batched, cold cache", repeated_recipes, batched, cache=True)
+    # The cold run left every unique line in the cache.
+    warm = report("batched, warm cache", repeated_recipes, batched, cache=True)
+    print(
+        f"dedup saves {1 - cold / baseline:.0%}, "
+        f"a warm cache {1 - warm / baseline:.0%} of per-sentence time"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare the parsel-based and streaming sitemap parsers.
+
+Generates a synthetic urlset and parses it in a fresh subprocess per
+implementation, so the reported peak RSS belongs to that parser alone.
+
+    python benchmarks/bench_sitemap_parsing.py --urls 50000
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+
+def build_sitemap(path: Path, total_urls: int) -> None:
+    with path.open("w") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for index in range(total_urls):
+            file.write(
+                f"  <url><loc>https://www.example.com/recipes/dish-{index}</loc>"
+                f"<lastmod>2024-01-{index % 28 + 1:02d}</lastmod>"
+                "<changefreq>weekly</changefreq></url>\n"
+            )
+        file.write("</urlset>\n")
+
+
+def parse_legacy(xml: str, base_url: str) -> tuple[list[str], list[str]]:
+    from parsel import Selector
+
+    urls = []
+    subsitemap_urls = []
+    selector = Selector(xml, type="html")
+    for loc_element in selector.xpath("//sitemap/loc | //url/loc"):
+        url = loc_element.xpath("./text()").get()
+        if not url:
+            continue
+        urlparse(url.strip())
+        if loc_element.xpath("name(..)").get() == "sitemap":
+            subsitemap_urls.append(urljoin(base_url, url))
+        else:
+            urls.append(url)
+    return urls, subsitemap_urls
+
+
+def parse_streaming(xml: str, base_url: str) -> tuple[list[str], list[str]]:
+    from chorba.lib.sitemap import GenericSitemapParser
+
+    return GenericSitemapParser(base_url)._parse_sitemap_urls(xml, base_url)
+
+
+PARSERS = {"parsel": parse_legacy, "streaming": parse_streaming}
+
+
+def run_one(name: str, path: Path) -> None:
+    xml = path.read_text()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    urls, _ = PARSERS[name](xml, "https://www.example.com/sitemap.xml")
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        f"{name:>10}: {elapsed:.3f}s, {len(urls)} urls, "
+        f"peak RSS {peak / 1024:.1f} MiB (+{(peak - baseline) / 1024:.1f} MiB)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=50_000)
+    parser.add_argument("--run", choices=PARSERS, help=argparse.SUPPRESS)
+    parser.add_argument("--path", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(args.run, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "sitemap.xml"
+        build_sitemap(path, args.urls)
+        print(f"sitemap: {args.urls} urls, {path.stat().st_size / 1024 / 1024:.1f} MiB")
+        for name in PARSERS:
+            subprocess.run(
+                [sys.executable, __file__, "--run", name, "--path", str(path)],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Compare strategies for finding the structured recipe data on a page.
+
+"full" runs extruct over every syntax, "lazy" extracts one pre-scanned syntax
+at a time, and "fast" first tries the DOM-free JSON-LD extractor, then parses
+the page once for whichever syntaxes remain, as RecipeScraper does. Reads saved
+pages from tests/fixtures/html, or any directory of *.html files and *.html.gz
+blobs such as an --html-cache-dir. --pad-kb appends filler markup to each page
+to approximate the 1-3 MB documents real recipe sites serve.
+
+    python benchmarks/bench_structured_data.py --rounds 50 --pad-kb 1024
+    python benchmarks/bench_structured_data.py --pages ~/.cache/chorba/html
+"""
+
+import argparse
+import gzip
+import time
+from pathlib import Path
+
+import extruct
+from extruct.utils import parse_xmldom_html
+
+from chorba.lib.markup._jsonld import extract_jsonld
+from chorba.lib.markup.scraper import RecipeScraper
+
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "html"
+FILLER = (
+    '<div class="card"><a href="/recipes/{n}/"><img src="/img/{n}.jpg" alt="">'
+    "<h3>Related recipe {n}</h3></a><p>Ready in 30 minutes, serves 4.</p></div>\n"
+)
+
+
+def load_pages(directory: Path, pad_kb: int) -> list[str]:
+    pages = [path.read_text(encoding="utf-8") for path in directory.rglob("*.html")]
+    pages += [
+        gzip.decompress(path.read_bytes()).decode("utf-8")
+        for path in directory.rglob("*.html.gz")
+    ]
+    if pad_kb:
+        filler = "".join(
+            FILLER.format(n=n) for n in range(pad_kb * 1024 // len(FILLER))
+        )
+        pages = [page.replace("</body>", f"{filler}</body>") for page in pages]
+    return pages
+
+
+def full_pass(scraper: RecipeScraper, html: str) -> bool:
+    extracted = extruct.extract(html, syntaxes=scraper.syntax_names)
+    for processor in scraper._processors:
+        data = extracted.get(processor.syntax_name)
+        if data and processor.extract_recipe(data):
+            return True
+    return False
+
+
+def lazy(scraper: RecipeScraper, html: str) -> bool:
+    for processor in scraper._processors:
+        if not processor.may_contain(html):
+            continue
+        data = extruct.extract(html, syntaxes=[processor.syntax_name]).get(
+            processor.syntax_name
+        )
+        if data and processor.extract_recipe(data):
+            return True
+    return False
+
+
+def fast(scraper: RecipeScraper, html: str) -> bool:
+    if scraper._jsonld_processor.extract_recipe(extract_jsonld(html)):
+        return True
+
+    tree = None
+    for processor in scraper._processors:
+        if not processor.may_contain(html):
+            continue
+        if tree is None:
+            tree = parse_xmldom_html(html, encoding="UTF-8")
+        data = extruct.extract(tree, syntaxes=[processor.syntax_name]).get(
+            processor.syntax_name
+        )
+        if data and processor.extract_recipe(data):
+            return True
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=Path, default=FIXTURES)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--pad-kb", type=int, default=0)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages, args.pad_kb)
+    if not pages:
+        parser.error(f"no *.html or *.html.gz pages under {args.pages}")
+    scraper = RecipeScraper(max_workers=1)
+    total = len(pages) * args.rounds
+
+    for name, func in [("full", full_pass), ("lazy", lazy), ("fast", fast)]:
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            found = sum(func(scraper, html) for html in pages)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:>4}: {elapsed:.3f}s for {total} pages "
+            f"({found}/{len(pages)} recipes, {elapsed / total * 1e3:.2f} ms/page)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,27 @@
 import argparse
 import asyncio
+import hashlib
+import heapq
 import json
-import random
 import time
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 from curl_cffi import requests
-from pydantic import TypeAdapter
 
-from chorba.lib.markup._schema_org import Recipe, ensure_ingredient_parser_ready
+from chorba.lib.fetch_cache import HtmlCache
+from chorba.lib.markup._schema_org import (
+    Recipe,
+    ensure_ingredient_parser_ready,
+    prepare_recipes,
+)
+from chorba.lib.markup.engine import ExtractionEngine, serialize_recipe
 from chorba.lib.markup.scraper import RecipeScraper
-from chorba.lib.robot import RobotFileManager
-from chorba.lib.sitemap import SitemapParserFactory
+from chorba.lib.robot import RobotsManager
+from chorba.lib.sitemap import SitemapCache, SitemapFetchStats, SitemapParserFactory
+from chorba.lib.throttle import HostScheduler
 
 
-recipe_adapter = TypeAdapter(Recipe)
 HOST_SEED_URLS = {
     "bbc.co.uk": "https://www.bbc.co.uk/food",
 }
@@ -47,14 +53,18 @@ def sitemap_candidates_for_host(host: str) -> list[str]:
     return dedupe_urls(candidates)
 
 
-def resolve_sitemap_url(host: str) -> tuple[str | None, int]:
-    robot = RobotFileManager(seed_url_for_host(host))
+async def resolve_sitemap_url(
+    host: str, robots: RobotsManager
+) -> tuple[str | None, int]:
+    robot = await robots.get(seed_url_for_host(host))
     if robot.sitemap:
         return robot.sitemap, robot.crawl_delay
 
     for sitemap_url in sitemap_candidates_for_host(host):
         try:
-            response = requests.get(sitemap_url, impersonate="chrome", timeout=30)
+            response = await asyncio.to_thread(
+                requests.get, sitemap_url, impersonate="chrome", timeout=30
+            )
             response.raise_for_status()
         except Exception:
             continue
@@ -67,16 +77,46 @@ def dedupe_urls(urls: list[str]) -> list[str]:
     return list(dict.fromkeys(urls))
 
 
-def sample_urls(urls: list[str], per_site: int, rng: random.Random) -> list[str]:
-    if per_site <= 0 or len(urls) <= per_site:
-        return list(urls)
-    return rng.sample(urls, per_site)
+class UrlReservoir:
+    """Uniform sample of up to ``size`` distinct URLs from a stream.
+
+    Each URL gets a pseudo-random priority hashed from ``key`` and the URL, and
+    the ``size`` lowest priorities are kept. The sample therefore depends only on
+    which URLs were seen, not on the order discovery yields them. A repeated URL
+    lands on its own priority, so the set of 64-bit priorities seen, kept instead
+    of the URLs, both drops repeats and counts ``distinct`` URLs; ``seen`` counts
+    every URL offered. A ``size`` of 0 or less keeps every URL.
+    """
+
+    def __init__(self, size: int, key: str) -> None:
+        self.size = size
+        self.seen = 0
+        self._salt = key.encode() + b"\0"
+        self._heap: list[tuple[int, str]] = []
+        self._priorities: set[int] = set()
+
+    @property
+    def distinct(self) -> int:
+        return len(self._priorities)
 
+    def _priority(self, url: str) -> int:
+        digest = hashlib.blake2b(self._salt + url.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
 
-def serialize_recipe(recipe: Recipe | None) -> dict | None:
-    if recipe is None:
-        return None
-    return recipe_adapter.dump_python(recipe, mode="json")
+    def add(self, url: str) -> None:
+        self.seen += 1
+        priority = self._priority(url)
+        if priority in self._priorities:
+            return
+
+        self._priorities.add(priority)
+        if self.size <= 0 or len(self._heap) < self.size:
+            heapq.heappush(self._heap, (-priority, url))
+        elif priority < -self._heap[0][0]:
+            heapq.heapreplace(self._heap, (-priority, url))
+
+    def sample(self) -> list[str]:
+        return [url for _, url in sorted(self._heap, reverse=True)]
 
 
 def parse_hosts(hosts: str | None) -> list[str]:
@@ -85,17 +125,34 @@ def parse_hosts(hosts: str | None) -> list[str]:
     return [host.strip() for host in hosts.split(",") if host.strip()]
 
 
-async def discover_recipe_urls(host: str) -> tuple[str | None, int, list[str]]:
-    robot = RobotFileManager(seed_url_for_host(host))
-    sitemap, crawl_delay = resolve_sitemap_url(host)
+async def discover_recipe_urls(
+    host: str,
+    robots: RobotsManager,
+    *,
+    per_site: int,
+    seed: int,
+    fetch_concurrency: int = 4,
+    fetch_stats: SitemapFetchStats | None = None,
+    sitemap_cache: SitemapCache | None = None,
+) -> tuple[str | None, int, UrlReservoir]:
+    reservoir = UrlReservoir(per_site, key=f"{seed}:{host}")
+    robot = await robots.get(seed_url_for_host(host))
+    sitemap, crawl_delay = await resolve_sitemap_url(host, robots)
     if not sitemap:
-        return None, crawl_delay, []
-
-    parser = SitemapParserFactory.from_xml_url(sitemap)
-    urls = await parser.get_recipe_urls()
-    urls = dedupe_urls(robot.filter_urls(urls))
+        return None, crawl_delay, reservoir
+
+    parser = SitemapParserFactory.from_xml_url(
+        sitemap,
+        robots=robots,
+        fetch_concurrency=fetch_concurrency,
+        fetch_stats=fetch_stats,
+        cache=sitemap_cache,
+    )
+    async for urls in parser.iter_recipe_url_batches():
+        for url in robot.filter_urls(urls):
+            reservoir.add(url)
 
-    return sitemap, crawl_delay, urls
+    return sitemap, crawl_delay, reservoir
 
 
 def build_record(
@@ -106,9 +163,12 @@ def build_record(
     seed: int,
     sample_index: int,
     url: str,
-    recipe: Recipe | None,
+    recipe: Recipe | dict | None,
     error: str | None,
+    serialize: bool = True,
 ) -> dict:
+    if serialize and isinstance(recipe, Recipe):
+        recipe = serialize_recipe(recipe)
     return {
         "host": host,
         "sitemap": sitemap,
@@ -119,10 +179,30 @@ def build_record(
         "scrape_ok": error is None,
         "recipe_found": recipe is not None,
         "error": error,
-        "recipe": serialize_recipe(recipe),
+        "recipe": recipe,
     }
 
 
+def serialize_records(records: list[dict]) -> None:
+    """Serialize the Recipe objects left in ``records``, in place.
+
+    Their ingredients are parsed together first, so sentences shared between
+    recipes are parsed once per batch.
+    """
+    recipes = [
+        record["recipe"]
+        for record in records
+        if isinstance(record.get("recipe"), Recipe)
+    ]
+    if not recipes:
+        return
+
+    prepare_recipes(recipes)
+    for record in records:
+        if isinstance(record.get("recipe"), Recipe):
+            record["recipe"] = serialize_recipe(record["recipe"])
+
+
 @dataclass
 class HostSamplingResult:
     host: str
@@ -131,10 +211,196 @@ class HostSamplingResult:
     discovered_urls: int
     sampled_urls: int
     skipped: bool
-    records: list[dict]
     discovery_error: str | None
 
 
+@dataclass
+class SamplingCounters:
+    records: int = 0
+    recipes_found: int = 0
+    scrape_failures: int = 0
+
+    def add(self, record: dict) -> None:
+        self.records += 1
+        if record["recipe_found"]:
+            self.recipes_found += 1
+        if not record["scrape_ok"]:
+            self.scrape_failures += 1
+
+
+@dataclass
+class HostPlan:
+    host: str
+    seed: int
+    per_site: int
+    sitemap: str
+    crawl_delay: int
+    discovered_urls: int
+    sampled: list[str]
+
+
+def journal_path_for(output: Path) -> Path:
+    return output.with_name(f"{output.name}.journal")
+
+
+def load_completed_urls(output: Path) -> set[tuple[str, str]]:
+    """Read finished (host, url) pairs, dropping a partially written last line."""
+    if not output.exists():
+        return set()
+
+    content = output.read_bytes()
+    complete_length = content.rfind(b"\n") + 1
+    if complete_length < len(content):
+        with output.open("r+b") as output_file:
+            output_file.truncate(complete_length)
+
+    completed = set()
+    for line in content[:complete_length].decode("utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        completed.add((record["host"], record["url"]))
+    return completed
+
+
+class SamplingCheckpoint:
+    """Journal of per-host sampling plans plus the URLs already in the output."""
+
+    def __init__(
+        self,
+        journal_path: Path,
+        plans: dict[str, HostPlan] | None = None,
+        completed: set[tuple[str, str]] | None = None,
+    ) -> None:
+        self.journal_path = journal_path
+        self.plans = plans or {}
+        self.completed = completed or set()
+
+    @classmethod
+    def fresh(cls, output: Path) -> "SamplingCheckpoint":
+        journal_path = journal_path_for(output)
+        journal_path.write_text("", encoding="utf-8")
+        return cls(journal_path)
+
+    @staticmethod
+    def _read_plans(journal_path: Path) -> dict[str, HostPlan]:
+        plans = {}
+        if journal_path.exists():
+            with journal_path.open("r", encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        plan = HostPlan(**json.loads(line))
+                    except (json.JSONDecodeError, TypeError):
+                        continue
+                    plans[plan.host] = plan
+        return plans
+
+    @classmethod
+    def resume(cls, output: Path) -> "SamplingCheckpoint":
+        journal_path = journal_path_for(output)
+        plans = cls._read_plans(journal_path)
+        return cls(journal_path, plans, load_completed_urls(output))
+
+    @classmethod
+    def replay(cls, output: Path) -> "SamplingCheckpoint":
+        """Reuse the journaled samples but scrape every URL again."""
+        journal_path = journal_path_for(output)
+        return cls(journal_path, cls._read_plans(journal_path))
+
+    def plan_for(self, host: str, *, seed: int, per_site: int) -> HostPlan | None:
+        plan = self.plans.get(host)
+        if plan is None or plan.seed != seed or plan.per_site != per_site:
+            return None
+        return plan
+
+    def record_plan(self, plan: HostPlan) -> None:
+        self.plans[plan.host] = plan
+        with self.journal_path.open("a", encoding="utf-8") as journal_file:
+            journal_file.write(json.dumps(asdict(plan), ensure_ascii=True) + "\n")
+
+    def is_done(self, host: str, url: str) -> bool:
+        return (host, url) in self.completed
+
+
+class RecordWriter:
+    """Single writer task that appends records to the JSONL output as they arrive.
+
+    Records may carry an unserialized Recipe; whatever has queued up by the time
+    the writer wakes is serialized as one batch off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        flush_every: int = 10,
+        flush_interval: float = 5.0,
+        mode: str = "w",
+    ) -> None:
+        self.path = path
+        self.flush_every = max(flush_every, 1)
+        self.flush_interval = flush_interval
+        self.mode = mode
+        self.counters = SamplingCounters()
+        self._queue: asyncio.Queue[dict | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "RecordWriter":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._queue.put(None)
+        await self._task
+
+    async def put(self, record: dict) -> None:
+        await self._queue.put(record)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self.path.open(self.mode, encoding="utf-8") as output_file:
+            pending = 0
+            last_flush = loop.time()
+            done = False
+            while not done:
+                # With unflushed records, wake up when they are due to be flushed
+                # even if nothing else arrives.
+                timeout = None
+                if pending:
+                    timeout = max(last_flush + self.flush_interval - loop.time(), 0)
+                try:
+                    batch = [await asyncio.wait_for(self._queue.get(), timeout)]
+                except asyncio.TimeoutError:
+                    batch = []
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                if None in batch:
+                    batch = batch[: batch.index(None)]
+                    done = True
+
+                if batch:
+                    await asyncio.to_thread(serialize_records, batch)
+                for record in batch:
+                    output_file.write(json.dumps(record, ensure_ascii=True) + "\n")
+                    self.counters.add(record)
+                pending += len(batch)
+
+                if pending and (
+                    pending >= self.flush_every
+                    or loop.time() - last_flush >= self.flush_interval
+                ):
+                    output_file.flush()
+                    pending = 0
+                    last_flush = loop.time()
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Sample recipe URLs from supported sitemaps and dump scraped results as JSONL."
@@ -175,7 +441,100 @@ def parse_args() -> argparse.Namespace:
         default=4,
         help="Maximum number of hosts to process in parallel.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--per-host-concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent fetches per host.",
+    )
+    parser.add_argument(
+        "--sitemap-concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent sub-sitemap fetches per host.",
+    )
+    parser.add_argument(
+        "--default-rate",
+        type=float,
+        default=2.0,
+        help="Requests per second for hosts whose robots.txt has no crawl delay. 0 disables the limit.",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=16,
+        help="Maximum number of fetches in flight across all hosts.",
+    )
+    parser.add_argument(
+        "--extraction-workers",
+        type=int,
+        default=0,
+        help="Run extraction in a pool of this many processes. Defaults to in-process threads.",
+    )
+    parser.add_argument(
+        "--flush-every",
+        type=int,
+        default=10,
+        help="Flush the JSONL output after this many records.",
+    )
+    parser.add_argument(
+        "--robots-cache-dir",
+        type=Path,
+        default=None,
+        help="Persist fetched robots.txt files in this directory between runs.",
+    )
+    parser.add_argument(
+        "--sitemap-cache-dir",
+        type=Path,
+        default=None,
+        help="Keep parsed sitemaps here and revalidate them with conditional requests on later runs.",
+    )
+    parser.add_argument(
+        "--html-cache-dir",
+        type=Path,
+        default=None,
+        help="Cache fetched recipe pages here, compressed and deduplicated by content.",
+    )
+    parser.add_argument(
+        "--html-cache-max-bytes",
+        type=int,
+        default=1024**3,
+        help="Evict the least recently used cached pages beyond this many bytes.",
+    )
+    parser.add_argument(
+        "--early-stop",
+        action="store_true",
+        help="Stop downloading a page once a complete JSON-LD recipe has been received.",
+    )
+    parser.add_argument(
+        "--max-html-bytes",
+        type=int,
+        default=None,
+        help="Read at most this many bytes of each recipe page.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Serve pages only from --html-cache-dir and rescrape the journaled samples of --output.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to an existing output, skipping URLs it already contains and reusing journaled samples.",
+    )
+    args = parser.parse_args()
+    if args.offline and args.html_cache_dir is None:
+        parser.error("--offline requires --html-cache-dir")
+    return args
+
+
+async def extract_recipe(
+    html: str, scraper: RecipeScraper, engine: ExtractionEngine | None
+) -> Recipe | dict | None:
+    if engine is None:
+        # RecordWriter parses the ingredients of queued recipes in batches.
+        return await scraper.scrape_html(html, prepare=False)
+    return await engine.extract(html)
 
 
 async def sample_host(
@@ -184,12 +543,24 @@ async def sample_host(
     per_site: int,
     seed: int,
     semaphore: asyncio.Semaphore,
+    scraper: RecipeScraper,
+    writer: RecordWriter,
+    checkpoint: SamplingCheckpoint,
+    scheduler: HostScheduler,
+    engine: ExtractionEngine | None = None,
+    sitemap_concurrency: int = 4,
+    sitemap_cache: SitemapCache | None = None,
+    offline: bool = False,
 ) -> HostSamplingResult:
     async with semaphore:
-        try:
-            sitemap, crawl_delay, urls = await discover_recipe_urls(host)
-        except Exception as exc:
-            print(f"{host}: skipped during discovery ({exc})")
+        plan = checkpoint.plan_for(host, seed=seed, per_site=per_site)
+        if plan is not None:
+            print(
+                f"{host}: resuming sitemap={plan.sitemap} sampled={len(plan.sampled)} "
+                f"done={sum(checkpoint.is_done(host, url) for url in plan.sampled)}"
+            )
+        elif offline:
+            print(f"{host}: skipped (offline and no journaled sample)")
             return HostSamplingResult(
                 host=host,
                 sitemap=None,
@@ -197,69 +568,118 @@ async def sample_host(
                 discovered_urls=0,
                 sampled_urls=0,
                 skipped=True,
-                records=[],
-                discovery_error=str(exc),
+                discovery_error=None,
             )
+        else:
+            fetch_stats = SitemapFetchStats()
+            try:
+                sitemap, crawl_delay, reservoir = await discover_recipe_urls(
+                    host,
+                    scraper.robots,
+                    per_site=per_site,
+                    seed=seed,
+                    fetch_concurrency=sitemap_concurrency,
+                    fetch_stats=fetch_stats,
+                    sitemap_cache=sitemap_cache,
+                )
+            except Exception as exc:
+                print(f"{host}: skipped during discovery ({exc})")
+                return HostSamplingResult(
+                    host=host,
+                    sitemap=None,
+                    crawl_delay=0,
+                    discovered_urls=0,
+                    sampled_urls=0,
+                    skipped=True,
+                    discovery_error=str(exc),
+                )
 
-        if not sitemap:
-            print(f"{host}: skipped (no sitemap found)")
-            return HostSamplingResult(
+            if not sitemap:
+                print(f"{host}: skipped (no sitemap found)")
+                return HostSamplingResult(
+                    host=host,
+                    sitemap=None,
+                    crawl_delay=crawl_delay,
+                    discovered_urls=0,
+                    sampled_urls=0,
+                    skipped=True,
+                    discovery_error=None,
+                )
+
+            plan = HostPlan(
                 host=host,
-                sitemap=None,
+                seed=seed,
+                per_site=per_site,
+                sitemap=sitemap,
                 crawl_delay=crawl_delay,
-                discovered_urls=0,
-                sampled_urls=0,
-                skipped=True,
-                records=[],
-                discovery_error=None,
+                discovered_urls=reservoir.distinct,
+                sampled=reservoir.sample(),
             )
+            checkpoint.record_plan(plan)
+            print(
+                f"{host}: sitemap={plan.sitemap} discovered={plan.discovered_urls} "
+                f"sampled={len(plan.sampled)} crawl_delay={plan.crawl_delay}"
+            )
+            print(f"{host}: sitemap {fetch_stats.describe()}")
 
-        rng = random.Random(f"{seed}:{host}")
-        sampled = sample_urls(urls, per_site, rng)
-        print(
-            f"{host}: sitemap={sitemap} discovered={len(urls)} sampled={len(sampled)} crawl_delay={crawl_delay}"
-        )
-
-        scraper = RecipeScraper()
-        records = []
-        for sample_index, url in enumerate(sampled):
-            recipe = None
-            error = None
+        pending = [
+            (sample_index, url)
+            for sample_index, url in enumerate(plan.sampled)
+            if not checkpoint.is_done(host, url)
+        ]
 
+        async def fetch_sample(item: tuple[int, str]) -> tuple[str | None, str | None]:
+            _, url = item
             try:
-                recipe = await asyncio.to_thread(scraper.scrape_from_url, url)
+                return await scraper.fetch_html(url), None
             except Exception as exc:
-                error = str(exc)
+                return None, str(exc)
+
+        async def process_sample(
+            item: tuple[int, str], fetched: tuple[str | None, str | None]
+        ) -> None:
+            sample_index, url = item
+            html, error = fetched
+            recipe = None
+
+            if html is not None:
+                try:
+                    recipe = await extract_recipe(html, scraper, engine)
+                except Exception as exc:
+                    error = str(exc)
 
-            records.append(
+            await writer.put(
                 build_record(
                     host=host,
-                    sitemap=sitemap,
-                    crawl_delay=crawl_delay,
+                    sitemap=plan.sitemap,
+                    crawl_delay=plan.crawl_delay,
                     seed=seed,
                     sample_index=sample_index,
                     url=url,
                     recipe=recipe,
                     error=error,
+                    serialize=False,
                 )
             )
 
-            if crawl_delay > 0 and sample_index < len(sampled) - 1:
-                await asyncio.sleep(crawl_delay)
+        await scheduler.run(
+            pending, fetch_sample, process_sample, crawl_delay=plan.crawl_delay
+        )
 
         return HostSamplingResult(
             host=host,
-            sitemap=sitemap,
-            crawl_delay=crawl_delay,
-            discovered_urls=len(urls),
-            sampled_urls=len(sampled),
+            sitemap=plan.sitemap,
+            crawl_delay=plan.crawl_delay,
+            discovered_urls=plan.discovered_urls,
+            sampled_urls=len(plan.sampled),
             skipped=False,
-            records=records,
             discovery_error=None,
         )
 
 
-async def run_sampling(args: argparse.Namespace) -> list[HostSamplingResult]:
+async def run_sampling(
+    args: argparse.Namespace,
+) -> tuple[list[HostSamplingResult], SamplingCounters]:
     ensure_ingredient_parser_ready()
 
     hosts = parse_hosts(args.hosts)
@@ -267,34 +687,84 @@ async def run_sampling(args: argparse.Namespace) -> list[HostSamplingResult]:
         hosts = hosts[: args.max_sites]
 
     semaphore = asyncio.Semaphore(max(args.host_concurrency, 1))
-    tasks = [
-        sample_host(host, per_site=args.per_site, seed=args.seed, semaphore=semaphore)
-        for host in hosts
-    ]
-    return await asyncio.gather(*tasks)
+    robots = RobotsManager(cache_dir=args.robots_cache_dir)
+    html_cache = None
+    if args.html_cache_dir is not None:
+        html_cache = HtmlCache(
+            args.html_cache_dir,
+            max_bytes=args.html_cache_max_bytes,
+            offline=args.offline,
+        )
+    scraper = RecipeScraper(
+        robots=robots,
+        html_cache=html_cache,
+        early_stop=args.early_stop,
+        max_html_bytes=args.max_html_bytes,
+    )
+    sitemap_cache = None
+    if args.sitemap_cache_dir is not None:
+        sitemap_cache = SitemapCache(args.sitemap_cache_dir)
+    engine = None
+    if args.extraction_workers > 0:
+        engine = ExtractionEngine(max_workers=args.extraction_workers)
+        await asyncio.to_thread(engine.start)
+
+    scheduler = HostScheduler(
+        per_host_concurrency=args.per_host_concurrency,
+        default_rate=args.default_rate,
+        max_in_flight=args.max_in_flight,
+    )
+    if args.resume:
+        checkpoint = SamplingCheckpoint.resume(args.output)
+    elif args.offline:
+        checkpoint = SamplingCheckpoint.replay(args.output)
+    else:
+        checkpoint = SamplingCheckpoint.fresh(args.output)
+
+    try:
+        async with RecordWriter(
+            args.output,
+            flush_every=args.flush_every,
+            mode="a" if args.resume else "w",
+        ) as writer:
+            tasks = [
+                sample_host(
+                    host,
+                    per_site=args.per_site,
+                    seed=args.seed,
+                    semaphore=semaphore,
+                    scraper=scraper,
+                    writer=writer,
+                    checkpoint=checkpoint,
+                    scheduler=scheduler,
+                    engine=engine,
+                    sitemap_concurrency=args.sitemap_concurrency,
+                    sitemap_cache=sitemap_cache,
+                    offline=args.offline,
+                )
+                for host in hosts
+            ]
+            results = await asyncio.gather(*tasks)
+        return results, writer.counters
+    finally:
+        await scraper.aclose()
+        await robots.aclose()
+        if engine is not None:
+            engine.shutdown()
 
 
 def main() -> None:
     args = parse_args()
     args.output.parent.mkdir(parents=True, exist_ok=True)
 
-    results = asyncio.run(run_sampling(args))
+    results, counters = asyncio.run(run_sampling(args))
 
     attempted_hosts = len(results)
     skipped_hosts = sum(1 for result in results if result.skipped)
     discovered_urls = sum(result.discovered_urls for result in results)
     sampled_urls = sum(result.sampled_urls for result in results)
-    recipes_found = sum(
-        1 for result in results for record in result.records if record["recipe_found"]
-    )
-    scrape_failures = sum(
-        1 for result in results for record in result.records if not record["scrape_ok"]
-    )
-
-    with args.output.open("w", encoding="utf-8") as output_file:
-        for result in results:
-            for record in result.records:
-                output_file.write(json.dumps(record, ensure_ascii=True) + "\n")
+    recipes_found = counters.recipes_found
+    scrape_failures = counters.scrape_failures
 
     print(
         "Summary: "
@@ -1,16 +1,28 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 
 from chorba.lib.markup._schema_org import ensure_ingredient_parser_ready
-from chorba.web.routes import router
+from chorba.web.routes import (
+    extraction_engine,
+    recipe_scraper,
+    robots_manager,
+    router,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     ensure_ingredient_parser_ready()
+    if extraction_engine is not None:
+        await asyncio.to_thread(extraction_engine.start)
     yield
+    await recipe_scraper.aclose()
+    await robots_manager.aclose()
+    if extraction_engine is not None:
+        extraction_engine.shutdown()
 
 
 def create_app() -> FastAPI:
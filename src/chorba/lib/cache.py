@@ -0,0 +1,115 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Generic, Hashable, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe LRU cache with an optional per-entry time to live."""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+            )
+
+
+def cache_ttl(headers, default_ttl: float) -> float:
+    """Seconds a response may be reused, capped at ``default_ttl``.
+
+    Reads Cache-Control ``max-age``/``s-maxage``, then Expires; ``no-store`` and
+    ``no-cache`` yield 0.
+    """
+    cache_control = (headers.get("cache-control") or "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+
+    match = re.search(r"(?:^|[,\s])(?:s-maxage|max-age)\s*=\s*(\d+)", cache_control)
+    if match:
+        return min(float(match.group(1)), default_ttl)
+
+    expires = headers.get("expires")
+    if expires:
+        try:
+            return min(
+                max(parsedate_to_datetime(expires).timestamp() - time.time(), 0),
+                default_ttl,
+            )
+        except (TypeError, ValueError):
+            pass
+
+    return default_ttl
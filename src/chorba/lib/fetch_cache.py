@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from chorba.lib.cache import cache_ttl
+
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a URL is not in the fetch cache."""
+
+
+@dataclass
+class CachedPage:
+    url: str
+    digest: str
+    fetched_at: float
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+    html: str = field(default="", repr=False)
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        return self.expires_at > (time.time() if now is None else now)
+
+    def validators(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HtmlCache:
+    """Content-addressed, gzip-compressed on-disk store of fetched pages.
+
+    ``pages/`` maps each URL to the digest of its latest body plus freshness
+    metadata, and ``blobs/`` holds one compressed file per distinct body, so
+    identical pages share storage. Once blobs exceed ``max_bytes`` the least
+    recently read ones are evicted until they fit in ``low_water`` of it, so a
+    full cache is not rescanned on every store. Page entries left without a
+    blob are removed along with them.
+
+    Freshness follows the response's Cache-Control or Expires, capped at
+    ``ttl``. Stale pages are revalidated with their ETag or Last-Modified.
+    With ``offline`` set, every cached page counts as fresh and misses raise
+    ``CacheMissError`` instead of going to the network.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = 1024 * 1024 * 1024,
+        ttl: float = 24 * 60 * 60,
+        offline: bool = False,
+        low_water: float = 0.9,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.ttl = ttl
+        self.offline = offline
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._blob_bytes: int | None = None
+
+    def _page_path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / "pages" / digest[:2] / f"{digest}.json"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.cache_dir / "blobs" / digest[:2] / f"{digest}.html.gz"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+        partial = path.with_name(f"{path.name}.{suffix}")
+        partial.write_bytes(data)
+        partial.replace(path)
+
+    def _read_page(self, url: str) -> CachedPage | None:
+        try:
+            data = json.loads(self._page_path(url).read_text(encoding="utf-8"))
+            page = CachedPage(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+        return page if page.url == url else None
+
+    def _write_page(self, page: CachedPage) -> None:
+        data = asdict(page)
+        del data["html"]
+        self._write_atomic(self._page_path(page.url), json.dumps(data).encode())
+
+    def lookup(self, url: str) -> CachedPage | None:
+        page = self._read_page(url)
+        if page is None:
+            return None
+
+        blob_path = self._blob_path(page.digest)
+        try:
+            page.html = gzip.decompress(blob_path.read_bytes()).decode("utf-8")
+            os.utime(blob_path)
+        except (OSError, EOFError, UnicodeDecodeError):
+            return None
+        return page
+
+    def store(self, url: str, html: str, headers) -> CachedPage:
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        try:
+            os.utime(blob_path)
+        except FileNotFoundError:
+            # New body, or one an eviction in another thread just removed.
+            compressed = gzip.compress(body)
+            self._write_atomic(blob_path, compressed)
+            self._add_blob_bytes(len(compressed))
+
+        now = time.time()
+        page = CachedPage(
+            url=url,
+            digest=digest,
+            fetched_at=now,
+            expires_at=now + cache_ttl(headers, self.ttl),
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+            html=html,
+        )
+        self._write_page(page)
+        return page
+
+    def refresh(self, page: CachedPage, headers) -> CachedPage:
+        """Extend a page after the server answered 304 Not Modified."""
+        now = time.time()
+        page.fetched_at = now
+        page.expires_at = now + cache_ttl(headers, self.ttl)
+        page.etag = headers.get("etag") or page.etag
+        page.last_modified = headers.get("last-modified") or page.last_modified
+        self._write_page(page)
+        return page
+
+    def _scan_blobs(self) -> list[tuple[float, int, Path]]:
+        blobs = []
+        for path in (self.cache_dir / "blobs").glob("*/*.html.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        return blobs
+
+    def _add_blob_bytes(self, size: int) -> None:
+        with self._lock:
+            if self._blob_bytes is None:
+                self._blob_bytes = sum(blob[1] for blob in self._scan_blobs())
+            else:
+                self._blob_bytes += size
+            if self._blob_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        blobs = sorted(self._scan_blobs())
+        total = sum(size for _, size, _ in blobs)
+        target = self.max_bytes * self.low_water
+        evicted = 0
+        for _, size, path in blobs:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        self._blob_bytes = total
+        swept = self._sweep_pages() if evicted else 0
+        self.logger.info(
+            f"Evicted {evicted} cached pages, {total} bytes left, "
+            f"removed {swept} page entries"
+        )
+
+    def _sweep_pages(self) -> int:
+        """Remove page entries whose blob is gone, so ``pages/`` stays bounded."""
+        removed = 0
+        for path in (self.cache_dir / "pages").glob("*/*.json"):
+            try:
+                digest = json.loads(path.read_text(encoding="utf-8"))["digest"]
+            except (OSError, ValueError, KeyError, TypeError):
+                digest = None
+            if not isinstance(digest, str) or not self._blob_path(digest).exists():
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
@@ -0,0 +1,233 @@
+import functools
+import json
+import re
+
+
+# Comments, and the raw-text elements whose contents may hold "<script" text
+# that an HTML parser would not treat as a tag.
+_MARKUP = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    r"|<(script|style|textarea|title)\b((?:\"[^\"]*\"|'[^']*'|[^'\">])*)>",
+    re.IGNORECASE | re.DOTALL,
+)
+_TYPE_ATTRIBUTE = re.compile(
+    r"""(?:^|\s)type\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE
+)
+_END_TAGS = {
+    name: re.compile(rf"</{name}\b[^>]*>", re.IGNORECASE)
+    for name in ("script", "style", "textarea", "title")
+}
+
+JSONLD_MIME_TYPE = "application/ld+json"
+
+
+def _is_jsonld_script(attributes: str) -> bool:
+    match = _TYPE_ATTRIBUTE.search(attributes)
+    if match is None:
+        return False
+    value = next(group for group in match.groups() if group is not None)
+    return value == JSONLD_MIME_TYPE
+
+
+def iter_jsonld_scripts(html: str):
+    """Yield the text of every ``<script type="application/ld+json">`` block.
+
+    Scans tags with a regex instead of building a DOM, skipping comments and
+    the contents of other raw-text elements the way an HTML parser would.
+    """
+    last_mention = html.rfind(JSONLD_MIME_TYPE)
+    if last_mention < 0:
+        return
+
+    # No ld+json script can open after the last mention of its MIME type, so
+    # the scan stops at the end of that tag instead of crossing the whole body.
+    scan_end = html.find(">", last_mention) + 1 or len(html)
+    position = 0
+    while (match := _MARKUP.search(html, position, scan_end)) is not None:
+        position = match.end()
+        name = match.group(1)
+        if name is None:
+            continue
+
+        end = _END_TAGS[name.lower()].search(html, position)
+        content_end = len(html) if end is None else end.start()
+        if name.lower() == "script" and _is_jsonld_script(match.group(2)):
+            yield html[position:content_end]
+        position = len(html) if end is None else end.end()
+
+
+def extract_jsonld(html: str) -> list[dict]:
+    """Parse the JSON-LD blocks of ``html`` into extruct's ``json-ld`` shape.
+
+    Blocks that are not valid JSON are skipped; extruct's own extractor, which
+    also tolerates comments, remains the fallback for those pages.
+    """
+    items = []
+    for script in iter_jsonld_scripts(html):
+        try:
+            data = json.loads(script, strict=False)
+        except ValueError:
+            continue
+        if isinstance(data, list):
+            items.extend(data)
+        elif isinstance(data, dict):
+            items.append(data)
+    return [item for item in items if item]
+
+
+class JsonLdStreamScanner:
+    """Collect a page as it streams in, spotting closed ld+json blocks.
+
+    ``feed`` only looks at the new text plus a short overlap with the previous
+    chunk, and returns True when a ``</script>`` has arrived after a mention of
+    the JSON-LD MIME type, i.e. when ``extract_jsonld(scanner.html)`` may now
+    see another complete block.
+    """
+
+    _overlap = 64
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._tail = ""
+        self._length = 0
+        self._scanned = 0
+        self._in_block = False
+
+    @property
+    def html(self) -> str:
+        html = "".join(self._parts)
+        self._parts = [html]
+        return html
+
+    def feed(self, text: str) -> bool:
+        self._parts.append(text)
+        window_start = self._length - len(self._tail)
+        window = self._tail + text
+        self._length += len(text)
+        self._tail = window[-self._overlap :]
+
+        closed = False
+        position = self._scanned - window_start
+        while True:
+            if not self._in_block:
+                mention = window.find(JSONLD_MIME_TYPE, position)
+                if mention < 0:
+                    break
+                self._in_block = True
+                position = mention + len(JSONLD_MIME_TYPE)
+
+            end = _END_TAGS["script"].search(window, position)
+            if end is None:
+                break
+            self._in_block = False
+            closed = True
+            position = end.end()
+
+        # Leave room for a mention or end tag split across chunks.
+        self._scanned = window_start + max(position, len(window) - self._overlap)
+        return closed
+
+
+def _is_reference(value: dict) -> bool:
+    return (
+        len(value) <= 2
+        and isinstance(value.get("@id"), str)
+        and all(key == "@id" or key == "@type" for key in value)
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _local_type_name(name: str) -> str:
+    # "Recipe", "schema:Recipe" and "https://schema.org/Recipe" all index as
+    # "Recipe".
+    return re.split(r"[/#:]", name)[-1]
+
+
+def _type_names(node: dict) -> list[str]:
+    node_type = node.get("@type") or node.get("type", "")
+    names = node_type if isinstance(node_type, list) else [node_type]
+    return [_local_type_name(name) for name in names if isinstance(name, str) and name]
+
+
+class JsonLdGraph:
+    """The JSON-LD nodes of a page, indexed by ``@id`` and by type.
+
+    Top-level items and the members of every ``@graph``, however deeply
+    nested, are the page's nodes and can be looked up by type in document
+    order. Nodes embedded in their properties are only indexed by ``@id``, and
+    only once a lookup misses among the page's nodes. References such as
+    ``{"@id": "#primaryimage"}`` stay in place until ``resolve`` is asked for
+    a value that holds them.
+    """
+
+    def __init__(self, items: list) -> None:
+        self.nodes: list[dict] = []
+        self._by_id: dict[str, dict] = {}
+        self._by_type: dict[str, list[dict]] = {}
+        self._embedded_indexed = False
+        for item in items:
+            self._add_node(item)
+
+    def _add_node(self, node) -> None:
+        if not isinstance(node, dict):
+            return
+
+        self.nodes.append(node)
+        node_id = node.get("@id")
+        if isinstance(node_id, str) and not _is_reference(node):
+            self._by_id.setdefault(node_id, node)
+        for type_name in _type_names(node):
+            self._by_type.setdefault(type_name, []).append(node)
+
+        graph = node.get("@graph")
+        if isinstance(graph, list):
+            for member in graph:
+                self._add_node(member)
+        elif isinstance(graph, dict):
+            self._add_node(graph)
+
+    def _index_embedded(self) -> None:
+        by_id = self._by_id
+        pending = [
+            [item for key, item in node.items() if key != "@graph"]
+            for node in reversed(self.nodes)
+        ]
+        while pending:
+            value = pending.pop()
+            if isinstance(value, dict):
+                node_id = value.get("@id")
+                if isinstance(node_id, str) and not _is_reference(value):
+                    by_id.setdefault(node_id, value)
+                value = list(value.values())
+            for item in reversed(value):
+                if isinstance(item, (dict, list)):
+                    pending.append(item)
+        self._embedded_indexed = True
+
+    def get(self, node_id: str) -> dict | None:
+        node = self._by_id.get(node_id)
+        if node is None and not self._embedded_indexed:
+            self._index_embedded()
+            node = self._by_id.get(node_id)
+        return node
+
+    def nodes_of_type(self, type_name: str) -> list[dict]:
+        return self._by_type.get(type_name, [])
+
+    def resolve(self, value, depth: int = 2):
+        """Return ``value`` with references replaced by the nodes they name.
+
+        References inside resolved nodes are followed ``depth`` levels deep,
+        which also stops reference cycles. The indexed nodes are not modified
+        and unknown references are returned unchanged.
+        """
+        if isinstance(value, list):
+            return [self.resolve(item, depth) for item in value]
+        if not isinstance(value, dict):
+            return value
+
+        if _is_reference(value):
+            value = self.get(value["@id"]) or value
+        if depth <= 0:
+            return value
+        return {key: self.resolve(item, depth - 1) for key, item in value.items()}
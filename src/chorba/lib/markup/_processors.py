@@ -1,5 +1,7 @@
+import re
 from abc import ABC, abstractmethod
 
+from chorba.lib.markup._jsonld import JsonLdGraph
 from chorba.lib.markup._schema_org import Recipe
 
 
@@ -13,22 +15,6 @@ def _has_type(item: dict, schema_type: str) -> bool:
     return item_type == schema_type or schema_type in item_type
 
 
-def _jsonld_nodes(data: list[dict]) -> list[dict]:
-    nodes = []
-
-    for item in data:
-        if not isinstance(item, dict):
-            continue
-
-        nodes.append(item)
-
-        graph = item.get("@graph", [])
-        if isinstance(graph, list):
-            nodes.extend(node for node in graph if isinstance(node, dict))
-
-    return nodes
-
-
 def _single_video_candidate(candidates: list[dict]) -> dict:
     if len(candidates) == 1:
         return candidates[0]
@@ -47,29 +33,38 @@ class SyntaxProcessor(ABC):
         """Extract recipe data from the parsed syntax data."""
         pass
 
+    def may_contain(self, html: str) -> bool:
+        """Cheap pre-scan; False only if ``html`` cannot hold this syntax's data."""
+        return True
+
 
 class JSONLDProcessor(SyntaxProcessor):
     @property
     def syntax_name(self) -> str:
         return "json-ld"
 
-    def extract_recipe(self, data: list[dict]) -> dict:
-        nodes = _jsonld_nodes(data)
+    def may_contain(self, html: str) -> bool:
+        # extruct only reads <script type="application/ld+json"> blocks.
+        return "application/ld+json" in html
 
-        def is_recipe(item: dict) -> bool:
-            return _has_type(item, "Recipe")
+    _REFERENCE_PROPERTIES = ("author", "image", "thumbnailUrl", "video")
 
-        video_candidates = [item for item in nodes if _has_type(item, "VideoObject")]
+    def extract_recipe(self, data: list[dict]) -> dict:
+        graph = JsonLdGraph(data)
+        recipes = graph.nodes_of_type("Recipe")
+        if not recipes:
+            return {}
 
-        for item in nodes:
-            if is_recipe(item):
-                if not item.get("video"):
-                    maybe_video = _single_video_candidate(video_candidates)
-                    if maybe_video:
-                        item = {**item, "video": maybe_video}
-                return item
+        recipe = dict(recipes[0])
+        for prop in self._REFERENCE_PROPERTIES:
+            if prop in recipe:
+                recipe[prop] = graph.resolve(recipe[prop])
 
-        return {}
+        if not recipe.get("video"):
+            maybe_video = _single_video_candidate(graph.nodes_of_type("VideoObject"))
+            if maybe_video:
+                recipe["video"] = graph.resolve(maybe_video)
+        return recipe
 
 
 class MicrodataProcessor(SyntaxProcessor):
@@ -77,6 +72,13 @@ class MicrodataProcessor(SyntaxProcessor):
     def syntax_name(self) -> str:
         return "microdata"
 
+    _itemtype_attribute = re.compile(r"\bitemtype\b", re.IGNORECASE)
+
+    def may_contain(self, html: str) -> bool:
+        # Recipes are recognised by their itemtype, so itemscopes without one
+        # cannot match.
+        return self._itemtype_attribute.search(html) is not None
+
     def extract_recipe(self, data: list[dict]) -> dict:
         video_candidates = []
 
@@ -99,6 +101,14 @@ class RDFaProcessor(SyntaxProcessor):
     def syntax_name(self) -> str:
         return "rdfa"
 
+    _typeof_attribute = re.compile(r"\btypeof\b", re.IGNORECASE)
+
+    def may_contain(self, html: str) -> bool:
+        # Only typeof gives RDFa nodes an @type. Pages with nothing but
+        # property attributes are usually OpenGraph tags, which never yield
+        # a Recipe.
+        return self._typeof_attribute.search(html) is not None
+
     def extract_recipe(self, data: list[dict]) -> dict:
         node_lookup = {item["@id"]: item for item in data if "@id" in item}
 
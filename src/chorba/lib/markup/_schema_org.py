@@ -1,14 +1,26 @@
 from datetime import timedelta
 from fractions import Fraction
+from functools import cached_property
 import re
-from typing import Annotated, Literal
+from typing import Annotated, Iterable, Literal, NamedTuple
 
 from pydantic import Field, TypeAdapter, computed_field
 from pydantic.dataclasses import dataclass
 
+from chorba.lib.cache import CacheStats, LRUCache
+
 
 timedelta_adapter = TypeAdapter(timedelta)
+_WORD_CHAR = re.compile(r"\w")
+_GROUPED_STEMS_PATTERN = re.compile(
+    r"([A-Za-z][A-Za-z'-]*(?:\s*,\s*[A-Za-z][A-Za-z'-]*)+(?:\s+and\s+[A-Za-z][A-Za-z'-]*)?|[A-Za-z][A-Za-z'-]*(?:\s+and\s+[A-Za-z][A-Za-z'-]*)+)\s+$",
+    re.IGNORECASE,
+)
 _ingredient_parser_ready = False
+_INGREDIENT_CACHE_SIZE = 8192
+_ingredient_cache: LRUCache[str, "_IngredientFields"] = LRUCache(
+    maxsize=_INGREDIENT_CACHE_SIZE
+)
 _BLOCKED_SINGLE_WORD_ALIASES = {
     "oil",
     "sauce",
@@ -308,10 +320,82 @@ def ensure_ingredient_parser_ready() -> None:
     _ingredient_parser_ready = True
 
 
-def _normalize_ingredient(sentence: str, ingredient_id: str) -> Ingredient:
+class _IngredientFields(NamedTuple):
+    sentence: str
+    names: tuple[str, ...]
+    amounts: tuple[IngredientAmount, ...]
+    size: str | None
+    preparation: str | None
+    comment: str | None
+    purpose: str | None
+
+
+def configure_ingredient_cache(
+    maxsize: int = _INGREDIENT_CACHE_SIZE, ttl: float | None = None
+) -> None:
+    """Replace the process-wide parsed ingredient cache."""
+    global _ingredient_cache
+
+    _ingredient_cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+
+def ingredient_cache_stats() -> CacheStats:
+    return _ingredient_cache.stats()
+
+
+def _ingredient_cache_key(sentence: str) -> str:
+    return " ".join(sentence.split())
+
+
+def _parsed_ingredient_fields(parsed) -> _IngredientFields:
+    amounts = []
+    for amount in parsed.amount:
+        amounts.extend(_normalize_ingredient_amount(amount))
+
+    return _IngredientFields(
+        sentence=parsed.sentence,
+        names=tuple(item.text for item in parsed.name),
+        amounts=tuple(amounts),
+        size=_optional_text(parsed.size.text) if parsed.size else None,
+        preparation=_optional_text(parsed.preparation.text)
+        if parsed.preparation
+        else None,
+        comment=_optional_text(parsed.comment.text) if parsed.comment else None,
+        purpose=_optional_text(parsed.purpose.text) if parsed.purpose else None,
+    )
+
+
+def _parse_ingredient_fields(key: str, sentence: str) -> _IngredientFields | None:
     try:
         parsed = _parse_ingredient_sentence(sentence)
     except Exception:
+        return None
+
+    fields = _parsed_ingredient_fields(parsed)
+    _ingredient_cache.set(key, fields)
+    return fields
+
+
+def _ingredient_fields_batch(sentences: list[str]) -> list[_IngredientFields | None]:
+    keys = [_ingredient_cache_key(sentence) for sentence in sentences]
+    fields_by_key: dict[str, _IngredientFields | None] = {}
+
+    for key, sentence in zip(keys, sentences):
+        if key in fields_by_key:
+            continue
+
+        fields = _ingredient_cache.get(key)
+        if fields is None:
+            fields = _parse_ingredient_fields(key, sentence)
+        fields_by_key[key] = fields
+
+    return [fields_by_key[key] for key in keys]
+
+
+def _ingredient_from_fields(
+    sentence: str, ingredient_id: str, fields: _IngredientFields | None
+) -> Ingredient:
+    if fields is None:
         return Ingredient(
             id=ingredient_id,
             sentence=sentence,
@@ -323,24 +407,55 @@ def _normalize_ingredient(sentence: str, ingredient_id: str) -> Ingredient:
             purpose=None,
         )
 
-    amounts = []
-    for amount in parsed.amount:
-        amounts.extend(_normalize_ingredient_amount(amount))
-
     return Ingredient(
         id=ingredient_id,
-        sentence=parsed.sentence,
-        names=[item.text for item in parsed.name],
-        amounts=amounts,
-        size=_optional_text(parsed.size.text) if parsed.size else None,
-        preparation=_optional_text(parsed.preparation.text)
-        if parsed.preparation
-        else None,
-        comment=_optional_text(parsed.comment.text) if parsed.comment else None,
-        purpose=_optional_text(parsed.purpose.text) if parsed.purpose else None,
+        sentence=fields.sentence,
+        names=list(fields.names),
+        amounts=list(fields.amounts),
+        size=fields.size,
+        preparation=fields.preparation,
+        comment=fields.comment,
+        purpose=fields.purpose,
     )
 
 
+def normalize_ingredients(sentences: list[str]) -> list[Ingredient]:
+    """Parse a whole ingredient list at once.
+
+    Repeated sentences, within the batch or already in the process-wide cache,
+    are parsed only once.
+    """
+    return [
+        _ingredient_from_fields(sentence, f"ingredient_{index}", fields)
+        for index, (sentence, fields) in enumerate(
+            zip(sentences, _ingredient_fields_batch(sentences))
+        )
+    ]
+
+
+def prepare_recipes(recipes: Iterable["Recipe"]) -> None:
+    """Parse the ingredients of many recipes in one batch and memoize them."""
+    recipes = list(recipes)
+    sentences = [recipe._ingredient_sentences for recipe in recipes]
+    fields = _ingredient_fields_batch(
+        [sentence for recipe_sentences in sentences for sentence in recipe_sentences]
+    )
+
+    offset = 0
+    for recipe, recipe_sentences in zip(recipes, sentences):
+        recipe_fields = fields[offset : offset + len(recipe_sentences)]
+        offset += len(recipe_sentences)
+        # Directions memoized against the old ingredients would point at the
+        # wrong ids, so drop both before installing the batch result.
+        recipe.invalidate()
+        recipe.__dict__["ingredients"] = [
+            _ingredient_from_fields(sentence, f"ingredient_{index}", item)
+            for index, (sentence, item) in enumerate(
+                zip(recipe_sentences, recipe_fields)
+            )
+        ]
+
+
 def _extract_direction_steps(recipe_instructions) -> list[tuple[str | None, str]]:
     steps = []
 
@@ -464,6 +579,106 @@ def _ingredient_match_candidates(
     )
 
 
+def _fold_case(value: str) -> str:
+    lowered = value.lower()
+    if len(lowered) == len(value):
+        return lowered
+    # Keep offsets aligned with the original text when lowering changes length.
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in value)
+
+
+class _CandidateMatcher:
+    """Aho-Corasick automaton over the alias candidates of one recipe.
+
+    Finds every whole-word, case-insensitive occurrence of every candidate in
+    a single scan of the step text.
+    """
+
+    def __init__(self, candidates: list[tuple[str, str, bool]]) -> None:
+        self.candidates = candidates
+        self.known_phrases = {
+            (ingredient_id, candidate.lower())
+            for ingredient_id, candidate, _ in candidates
+        }
+
+        self._patterns: list[str] = []
+        pattern_ids: dict[str, int] = {}
+        self._candidate_patterns = []
+        for _, candidate, _ in candidates:
+            lowered = _fold_case(candidate)
+            if lowered not in pattern_ids:
+                pattern_ids[lowered] = len(self._patterns)
+                self._patterns.append(lowered)
+            self._candidate_patterns.append(pattern_ids[lowered])
+
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[int]] = [[]]
+        for pattern_id, pattern in enumerate(self._patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pattern_id)
+
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state].extend(
+                    self._output[self._fail[next_state]]
+                )
+
+    def _pattern_spans(self, text: str) -> list[list[tuple[int, int]]]:
+        lowered = _fold_case(text)
+        spans: list[list[tuple[int, int]]] = [[] for _ in self._patterns]
+        state = 0
+        for index, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            for pattern_id in self._output[state]:
+                end = index + 1
+                start = end - len(self._patterns[pattern_id])
+                if start > 0 and _WORD_CHAR.match(text, start - 1):
+                    continue
+                if _WORD_CHAR.match(text, end):
+                    continue
+                spans[pattern_id].append((start, end))
+
+        return spans
+
+    def find_all(self, text: str) -> list[list[tuple[int, int]]]:
+        """Return the spans of each candidate, in candidate order.
+
+        Like ``re.finditer`` for a single candidate, occurrences of the same
+        candidate never overlap each other.
+        """
+        pattern_spans = self._pattern_spans(text)
+        candidate_spans = []
+        for pattern_id in self._candidate_patterns:
+            spans = []
+            previous_end = 0
+            for start, end in pattern_spans[pattern_id]:
+                if start < previous_end:
+                    continue
+                spans.append((start, end))
+                previous_end = end
+            candidate_spans.append(spans)
+        return candidate_spans
+
+
 def _ingredient_names_by_text(ingredients: list[Ingredient]) -> dict[str, str]:
     names_by_text = {}
     for ingredient in ingredients:
@@ -490,21 +705,15 @@ def _parse_grouped_stems(value: str) -> list[str]:
 
 
 def _match_grouped_direction_ingredients(
-    text: str, ingredients: list[Ingredient]
+    text: str, index: "_HighlightIndex"
 ) -> tuple[list[tuple[int, int, list[str]]], list[tuple[str, int, int, list[str]]]]:
     matches = []
     grouped_references = []
-    names_by_text = _ingredient_names_by_text(ingredients)
+    names_by_text = index.names_by_text
 
-    for suffix in _groupable_suffixes(ingredients):
-        pattern = re.compile(rf"(?<!\w){re.escape(suffix)}(?!\w)", re.IGNORECASE)
+    for suffix, pattern in index.suffix_patterns:
         for suffix_match in pattern.finditer(text):
-            prefix = text[: suffix_match.start()]
-            group_match = re.search(
-                r"([A-Za-z][A-Za-z'-]*(?:\s*,\s*[A-Za-z][A-Za-z'-]*)+(?:\s+and\s+[A-Za-z][A-Za-z'-]*)?|[A-Za-z][A-Za-z'-]*(?:\s+and\s+[A-Za-z][A-Za-z'-]*)+)\s+$",
-                prefix,
-                re.IGNORECASE,
-            )
+            group_match = _GROUPED_STEMS_PATTERN.search(text, 0, suffix_match.start())
             if not group_match:
                 continue
 
@@ -527,8 +736,7 @@ def _match_grouped_direction_ingredients(
             matches.append((start, end, ids))
             grouped_references.append((suffix.lower(), start, end, ids))
 
-    for suffix in _groupable_suffixes(ingredients):
-        pattern = re.compile(rf"(?<!\w){re.escape(suffix)}(?!\w)", re.IGNORECASE)
+    for suffix, pattern in index.suffix_patterns:
         for match in pattern.finditer(text):
             start, end = match.span()
             if any(
@@ -578,15 +786,11 @@ def _is_unintroduced_group_suffix(
 
 
 def _extend_match_with_amount(
-    text: str, start: int, ingredient: Ingredient
+    text: str, start: int, amount_patterns: list[re.Pattern[str]]
 ) -> int:
     best_start = start
-    for amount_text in _ingredient_amount_aliases(ingredient):
-        match = re.search(
-            rf"(?<!\w){re.escape(amount_text)}\s+$",
-            text[:start],
-            re.IGNORECASE,
-        )
+    for pattern in amount_patterns:
+        match = pattern.search(text, 0, start)
         if match and match.start() < best_start:
             best_start = match.start()
     return best_start
@@ -619,7 +823,7 @@ def _is_extended_single_word_alias(
     end: int,
     ingredient_id: str,
     candidate: str,
-    ingredients: list[Ingredient],
+    matcher: _CandidateMatcher,
 ) -> bool:
     if not _single_word_alias_has_explicit_context(text, start, end):
         return True
@@ -633,38 +837,48 @@ def _is_extended_single_word_alias(
         return False
 
     extended_phrase = f"{candidate} {next_word}"
-    for candidate_ingredient_id, known_candidate, _ in _ingredient_match_candidates(
-        ingredients
-    ):
-        if candidate_ingredient_id != ingredient_id:
-            continue
-        if known_candidate.lower() == extended_phrase:
-            return False
+    return (ingredient_id, extended_phrase) not in matcher.known_phrases
 
-    return True
+
+class _HighlightIndex:
+    """Ingredient-derived tables and patterns shared by every step of a recipe."""
+
+    def __init__(self, ingredients: list[Ingredient]) -> None:
+        self.ingredients = ingredients
+        self.matcher = _CandidateMatcher(_ingredient_match_candidates(ingredients))
+        self.names_by_text = _ingredient_names_by_text(ingredients)
+        self.suffix_patterns = [
+            (suffix, re.compile(rf"(?<!\w){re.escape(suffix)}(?!\w)", re.IGNORECASE))
+            for suffix in _groupable_suffixes(ingredients)
+        ]
+        self.amount_patterns = {
+            ingredient.id: [
+                re.compile(rf"(?<!\w){re.escape(amount_text)}\s+$", re.IGNORECASE)
+                for amount_text in _ingredient_amount_aliases(ingredient)
+            ]
+            for ingredient in ingredients
+        }
 
 
 def _match_direction_ingredients(
-    text: str, ingredients: list[Ingredient]
+    text: str, index: _HighlightIndex
 ) -> list[tuple[int, int, list[str]]]:
-    matches, grouped_references = _match_grouped_direction_ingredients(text, ingredients)
+    matcher = index.matcher
+    matches, grouped_references = _match_grouped_direction_ingredients(text, index)
     occupied_ranges = [(start, end) for start, end, _ in matches]
-    ingredient_lookup = {ingredient.id: ingredient for ingredient in ingredients}
 
-    for ingredient_id, candidate, is_single_word_alias in _ingredient_match_candidates(
-        ingredients
+    for (ingredient_id, candidate, is_single_word_alias), spans in zip(
+        matcher.candidates, matcher.find_all(text)
     ):
-        pattern = re.compile(rf"(?<!\w){re.escape(candidate)}(?!\w)", re.IGNORECASE)
-        for match in pattern.finditer(text):
-            start, end = match.span()
-            ingredient = ingredient_lookup[ingredient_id]
-            start = _extend_match_with_amount(text, start, ingredient)
+        amount_patterns = index.amount_patterns[ingredient_id]
+        for start, end in spans:
+            start = _extend_match_with_amount(text, start, amount_patterns)
             if is_single_word_alias and _is_unintroduced_group_suffix(
                 candidate, start, grouped_references
             ):
                 continue
             if is_single_word_alias and _is_extended_single_word_alias(
-                text, start, end, ingredient_id, candidate, ingredients
+                text, start, end, ingredient_id, candidate, matcher
             ):
                 continue
             if any(
@@ -681,9 +895,9 @@ def _match_direction_ingredients(
 
 
 def _build_direction_highlights(
-    text: str, ingredients: list[Ingredient]
+    text: str, index: _HighlightIndex
 ) -> list[DirectionHighlight]:
-    matches = _match_direction_ingredients(text, ingredients)
+    matches = _match_direction_ingredients(text, index)
     highlights = []
     for start, end, ingredient_ids in matches:
         highlights.append(
@@ -712,34 +926,41 @@ class Recipe:
         "thumbnailUrl",
         "video",
     ]
+    _CACHED_FIELDS = ("ingredients", "directions")
     _data: dict = Field(exclude=True)
 
     def __init__(self, data: dict) -> None:
         self._data = data
 
+    def invalidate(self) -> None:
+        """Drop memoized ingredients and directions after mutating the source data."""
+        for name in self._CACHED_FIELDS:
+            self.__dict__.pop(name, None)
+
     @computed_field
     @property
     def title(self) -> str:
         return self._data.get("name", "")
 
-    @computed_field
     @property
+    def _ingredient_sentences(self) -> list[str]:
+        return list(self._data.get("recipeIngredient", []))
+
+    @computed_field
+    @cached_property
     def ingredients(self) -> list[Ingredient]:
-        return [
-            _normalize_ingredient(item, f"ingredient_{index}")
-            for index, item in enumerate(self._data.get("recipeIngredient", []))
-        ]
+        return normalize_ingredients(self._ingredient_sentences)
 
     @computed_field
-    @property
+    @cached_property
     def directions(self) -> list[Direction]:
-        ingredients = self.ingredients
+        highlight_index = _HighlightIndex(self.ingredients)
         directions = []
 
         for index, (section, text) in enumerate(
             _extract_direction_steps(self._data.get("recipeInstructions", []))
         ):
-            highlights = _build_direction_highlights(text, ingredients)
+            highlights = _build_direction_highlights(text, highlight_index)
             directions.append(
                 Direction(
                     id=f"step_{index}",
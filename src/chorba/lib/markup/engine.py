@@ -0,0 +1,83 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from pydantic import TypeAdapter
+
+from chorba.lib.markup._schema_org import Recipe, ensure_ingredient_parser_ready
+from chorba.lib.markup.scraper import RecipeScraper
+
+
+recipe_adapter = TypeAdapter(Recipe)
+_worker_scraper: RecipeScraper | None = None
+
+
+def serialize_recipe(recipe: Recipe | None) -> dict | None:
+    if recipe is None:
+        return None
+    return recipe_adapter.dump_python(recipe, mode="json")
+
+
+def _init_worker() -> None:
+    global _worker_scraper
+
+    ensure_ingredient_parser_ready()
+    _worker_scraper = RecipeScraper(max_workers=1)
+
+
+def _warm_worker() -> int:
+    return os.getpid()
+
+
+def extract_recipe_dict(html: str) -> Optional[dict]:
+    """Scrape raw HTML and return the serialized recipe, as the API renders it."""
+    scraper = _worker_scraper or RecipeScraper(max_workers=1)
+    return serialize_recipe(scraper.scrape(html))
+
+
+class ExtractionEngine:
+    """Process pool that runs extraction and serialization off the GIL."""
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def start(self) -> None:
+        """Spawn every worker and wait until each has warmed the ingredient parser.
+
+        Blocks, so async callers should run it via ``asyncio.to_thread``.
+        """
+        with self._lock:
+            if self._pool is not None:
+                return
+
+            pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            futures = [pool.submit(_warm_worker) for _ in range(self.max_workers)]
+            for future in futures:
+                future.result()
+            self._pool = pool
+
+    async def extract(self, html: str) -> Optional[dict]:
+        if self._pool is None:
+            await asyncio.to_thread(self.start)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, extract_recipe_dict, html)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+            self._pool = None
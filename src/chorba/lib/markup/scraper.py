@@ -1,8 +1,17 @@
+import asyncio
+import codecs
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 import extruct
-from curl_cffi import requests
+from curl_cffi.requests import AsyncSession
+from extruct.utils import parse_xmldom_html
 
+from chorba.lib.fetch_cache import CacheMissError, HtmlCache
+from chorba.lib.markup._jsonld import JsonLdStreamScanner, extract_jsonld
 from chorba.lib.markup._schema_org import Recipe
+from chorba.lib.robot import RobotsManager
+from chorba.lib.sessions import close_abandoned_session
 from chorba.lib.markup._processors import (
     SyntaxProcessor,
     JSONLDProcessor,
@@ -11,31 +20,193 @@ from chorba.lib.markup._processors import (
 )
 
 
+class FetchDisallowedError(Exception):
+    """Raised when robots.txt disallows fetching a URL."""
+
+
 class RecipeScraper:
-    def __init__(self):
+    """Fetch pages and extract their schema.org recipe.
+
+    With ``early_stop`` set, pages are streamed and the transfer is abandoned
+    as soon as a complete JSON-LD recipe has arrived, skipping the comments,
+    ads and scripts that usually follow it. ``max_html_bytes`` caps how much
+    of any page is read; either option switches fetches to streaming. Pages
+    cut short by either are not written to ``html_cache``.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_clients: int = 100,
+        robots: RobotsManager | None = None,
+        html_cache: HtmlCache | None = None,
+        early_stop: bool = False,
+        max_html_bytes: int | None = None,
+    ):
+        self._jsonld_processor = JSONLDProcessor()
         self._processors: list[SyntaxProcessor] = [
-            JSONLDProcessor(),
+            self._jsonld_processor,
             MicrodataProcessor(),
             RDFaProcessor(),
         ]
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="recipe-scraper"
+        )
+        self._max_clients = max_clients
+        self.robots = robots
+        self.html_cache = html_cache
+        self.early_stop = early_stop
+        self.max_html_bytes = max_html_bytes
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._session: AsyncSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
 
     @property
     def syntax_names(self) -> list[str]:
         return [processor.syntax_name for processor in self._processors]
 
-    def scrape_from_url(self, url: str) -> Optional[Recipe]:
-        response = requests.get(url, impersonate="chrome")
-        html = response.text
+    def _get_session(self) -> AsyncSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session_loop is not loop:
+            if self._session is not None:
+                close_abandoned_session(self._session, self._session_loop, self.logger)
+            self._session = AsyncSession(loop=loop, max_clients=self._max_clients)
+            self._session_loop = loop
+        return self._session
+
+    async def fetch_html(self, url: str) -> str:
+        cache = self.html_cache
+        cached = None
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.lookup, url)
+            if cached is not None and (cache.offline or cached.is_fresh()):
+                return cached.html
+            if cache.offline:
+                raise CacheMissError(f"{url} is not in the fetch cache")
+
+        if self.robots is not None and not await self.robots.can_fetch(url):
+            raise FetchDisallowedError(f"robots.txt disallows fetching {url}")
+
+        headers = cached.validators() if cached is not None else None
+        if self.early_stop or self.max_html_bytes is not None:
+            response, html, partial = await self._stream_html(url, headers)
+        else:
+            response = await self._get_session().get(
+                url, headers=headers, impersonate="chrome"
+            )
+            html, partial = response.text, False
+
+        if cache is not None:
+            if response.status_code == 304 and cached is not None:
+                await asyncio.to_thread(cache.refresh, cached, response.headers)
+                return cached.html
+            # Partial pages are not cached, so the cache only ever holds whole
+            # pages for offline runs and later re-extraction.
+            if response.status_code == 200 and not partial:
+                await asyncio.to_thread(cache.store, url, html, response.headers)
+        return html
+
+    async def _stream_html(self, url: str, headers: dict | None):
+        """Read ``url`` chunk by chunk, stopping early where configured.
+
+        Returns the response, the text read and whether that text is only part
+        of the page, because of ``early_stop`` or ``max_html_bytes``. Stopping
+        sets curl's abort flag, so the transfer ends at the next chunk instead
+        of the rest of the body still being downloaded and queued.
+        """
+        response = await self._get_session().get(
+            url, headers=headers, impersonate="chrome", stream=True
+        )
+        try:
+            decoder = codecs.getincrementaldecoder(response.encoding)(
+                errors="replace"
+            )
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        scanner = JsonLdStreamScanner()
+        received = 0
+        partial = True
+
+        try:
+            async for chunk in response.aiter_content():
+                capped = False
+                if self.max_html_bytes is not None:
+                    chunk = chunk[: self.max_html_bytes - received]
+                    capped = received + len(chunk) >= self.max_html_bytes
+                received += len(chunk)
 
-        return self.scrape(html)
+                closed_block = scanner.feed(decoder.decode(chunk))
+                if capped:
+                    break
+                if (
+                    self.early_stop
+                    and closed_block
+                    and self._jsonld_processor.extract_recipe(
+                        extract_jsonld(scanner.html)
+                    )
+                ):
+                    break
+            else:
+                scanner.feed(decoder.decode(b"", final=True))
+                partial = False
+        finally:
+            if partial and response.quit_now is not None:
+                # The write callback then fails the transfer; curl_cffi keeps
+                # that error in the stream queue we no longer read.
+                response.quit_now.set()
+            await response.aclose()
+        return response, scanner.html, partial
+
+    async def scrape_from_url(self, url: str) -> Optional[Recipe]:
+        return await self.scrape_html(await self.fetch_html(url))
+
+    async def scrape_html(self, html: str, *, prepare: bool = True) -> Optional[Recipe]:
+        """Extract the recipe of ``html`` in the executor.
+
+        With ``prepare`` unset, ingredients and directions are left to be
+        computed by the caller, e.g. in a batch with ``prepare_recipes``.
+        """
+        scrape = self._scrape_prepared if prepare else self.scrape
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, scrape, html)
+
+    async def aclose(self) -> None:
+        session, loop = self._session, self._session_loop
+        self._session = None
+        self._session_loop = None
+        if session is None:
+            return
+        if loop is asyncio.get_running_loop():
+            await session.close()
+        else:
+            close_abandoned_session(session, loop, self.logger)
+
+    def _scrape_prepared(self, html: str) -> Optional[Recipe]:
+        recipe = self.scrape(html)
+        if recipe is not None:
+            # Parse ingredients and build highlights here so serialization on
+            # the event loop only reads the memoized values.
+            recipe.directions
+        return recipe
 
     def scrape(self, html: str) -> Optional[Recipe]:
-        extracted_data = extruct.extract(html, syntaxes=self.syntax_names)
+        # Most recipes are JSON-LD, which only needs the ld+json script blocks
+        # rather than a DOM of the whole page.
+        recipe_data = self._jsonld_processor.extract_recipe(extract_jsonld(html))
+        if recipe_data:
+            return Recipe(recipe_data)
 
+        # Otherwise extract one syntax at a time, in priority order, stopping
+        # at the first recipe. The page is parsed at most once: the xml.dom
+        # flavoured tree RDFa needs serves the other extractors as well.
+        tree = None
         for processor in self._processors:
-            if processor.syntax_name not in extracted_data:
+            if not processor.may_contain(html):
                 continue
 
+            if tree is None:
+                tree = parse_xmldom_html(html, encoding="UTF-8")
+            extracted_data = extruct.extract(tree, syntaxes=[processor.syntax_name])
             data = extracted_data.get(processor.syntax_name)
             if not data:
                 continue
@@ -47,12 +218,22 @@ class RecipeScraper:
         return None
 
 
-if __name__ == "__main__":
+async def _main() -> None:
     scraper = RecipeScraper()
-    recipe = scraper.scrape_from_url("https://www.iankewks.com/classic-orange-chicken/")
+    try:
+        recipe = await scraper.scrape_from_url(
+            "https://www.iankewks.com/classic-orange-chicken/"
+        )
+    finally:
+        await scraper.aclose()
+
     if not recipe:
         print("No recipe found")
     else:
         print(recipe.title)
         print(recipe.ingredients)
         print(recipe.directions)
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
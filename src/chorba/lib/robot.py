@@ -1,19 +1,122 @@
+import asyncio
+import fnmatch
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+from functools import cached_property
+from pathlib import Path
 from urllib.parse import urljoin, urlparse
+
+from curl_cffi.requests import AsyncSession
+from robots.parser import RobotsParser
 from robots.robotparser import RobotFileParser
 
+from chorba.lib.cache import LRUCache, cache_ttl
+from chorba.lib.sessions import close_abandoned_session
+
+
+def robots_url_for(url: str) -> str:
+    parsed_url = urlparse(url)
+    return urljoin(f"{parsed_url.scheme}://{parsed_url.netloc}", "/robots.txt")
+
+
+_PLAIN_HTTP_URL = re.compile(r"https?://([A-Za-z0-9.:_-]+)([/?#][^%\s]*)?")
+
+
+def _robots_target(url: str) -> tuple[str, str]:
+    """Host and rule-matching path of ``url``, as ``RobotsParser.normalize_url``.
+
+    URLs that are already normalized take a single regex match.
+    """
+    match = _PLAIN_HTTP_URL.fullmatch(url)
+    if match is None:
+        return RobotsParser.normalize_url(url)
+    host, path = match.groups("")
+    if "//" in path:
+        return RobotsParser.normalize_url(url)
+    return host, path or "/"
+
+
+class RobotRules:
+    """One user agent's robots.txt rules compiled for evaluating many URLs.
+
+    ``robotspy`` walks the rule list, longest path first, for every URL and
+    applies the first rule that matches, testing each one as a literal prefix,
+    an exact ``$`` path or a wildcard pattern. Here every rule becomes one
+    alternative of a single regex, in the same order; ``re`` returns the first
+    alternative that matches, so one match call finds the winning rule.
+    """
+
+    def __init__(self, rp: RobotsParser, user_agent: str = "*") -> None:
+        self.allow_all = rp.allow_all
+        self.disallow_all = rp.disallow_all
+        self.host = rp.host
+
+        self._allowed = [rule.allowed for rule in rp.find_rules(user_agent)]
+        alternatives = [
+            f"({self._rule_pattern(rule.path)})"
+            for rule in rp.find_rules(user_agent)
+        ]
+        self._matcher = re.compile("|".join(alternatives)) if alternatives else None
+
+    @staticmethod
+    def _rule_pattern(path: str) -> str:
+        # Mirrors RobotsParser.can_fetch and RobotsParser.startswith_pattern.
+        if path == "*":
+            return ""
+
+        options = [re.escape(path)]
+        if path.endswith("$"):
+            options.append(re.escape(path[:-1]) + r"\Z")
+            if "*" in path:
+                options.append(fnmatch.translate(path[:-1]))
+        elif "*" in path:
+            if not path.endswith("*"):
+                path += "*"
+            options.append(fnmatch.translate(path.replace("?", "[?]")))
+        return "|".join(options)
+
+    def _allows_path(self, path: str) -> bool:
+        match = self._matcher.match(path) if self._matcher is not None else None
+        if match is None:
+            return True
+        return self._allowed[match.lastindex - 1]
+
+    def can_fetch(self, url: str) -> bool:
+        if self.allow_all:
+            return True
+        if self.disallow_all:
+            return False
+
+        host, path = _robots_target(url)
+        if host and self.host and host != self.host:
+            return False
+        return self._allows_path(path)
+
+    def filter_urls(self, urls: list[str]) -> list[str]:
+        if self.allow_all:
+            return list(urls)
+        if self.disallow_all:
+            return []
+        return [url for url in urls if self.can_fetch(url)]
+
 
 class RobotFileManager:
     rp: RobotFileParser
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, rp: RobotFileParser | None = None):
         self.og_url = url
         parsed_url = urlparse(url)
         self.base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
         self.path = parsed_url.path
-        robots_url = urljoin(self.base_url, "/robots.txt")
 
-        self.rp = RobotFileParser(robots_url)
-        self.rp.read()
+        if rp is None:
+            rp = RobotFileParser(robots_url_for(url))
+            rp.read()
+        self.rp = rp
 
     @property
     def sitemap(self) -> str | None:
@@ -40,7 +143,240 @@ class RobotFileManager:
 
         if rp_crawl_delay is None:
             return 0
-        return int(rp_crawl_delay)
+        return math.ceil(rp_crawl_delay)
+
+    @cached_property
+    def rules(self) -> RobotRules:
+        if isinstance(self.rp, _RobotFileParser):
+            return self.rp.rules
+        return RobotRules(self.rp)
+
+    def can_fetch(self, url: str) -> bool:
+        return self.rp.can_fetch("*", url)
 
     def filter_urls(self, urls: list[str]) -> list[str]:
-        return [url for url in urls if self.rp.can_fetch("*", url)]
+        return self.rules.filter_urls(urls)
+
+
+def _parse_crawl_delays(lines: list[str]) -> dict[str, float]:
+    """Map each user agent to the ``Crawl-delay`` of its group, in seconds."""
+    delays = {}
+    agents: list[str] = []
+    in_agent_lines = False
+    for line in lines:
+        key, _, value = line.split("#", 1)[0].partition(":")
+        key = key.strip().lower()
+        value = value.strip()
+        if key == "user-agent":
+            if not in_agent_lines:
+                agents = []
+            agents.append(value.lower())
+            in_agent_lines = True
+            continue
+
+        in_agent_lines = False
+        if key != "crawl-delay":
+            continue
+        try:
+            delay = float(value)
+        except ValueError:
+            continue
+        if math.isfinite(delay) and delay >= 0:
+            for agent in agents:
+                delays.setdefault(agent, delay)
+    return delays
+
+
+class _RobotFileParser(RobotFileParser):
+    """``RobotFileParser`` that also reads ``Crawl-delay``.
+
+    robotspy follows Google's parser, which ignores the directive, so its
+    ``crawl_delay`` always returns None.
+    """
+
+    def __init__(self, url: str = "") -> None:
+        super().__init__(url)
+        self.crawl_delays: dict[str, float] = {}
+
+    def parse(self, lines) -> None:
+        lines = list(lines)
+        self.crawl_delays = _parse_crawl_delays(lines)
+        super().parse(lines)
+
+    def crawl_delay(self, useragent: str) -> float | None:
+        delay = self.crawl_delays.get(useragent.lower())
+        if delay is None:
+            delay = self.crawl_delays.get("*")
+        return delay
+
+    @cached_property
+    def rules(self) -> RobotRules:
+        # Compiled on first use and cached with the parser, so RobotsManager
+        # builds them once per cached robots.txt.
+        return RobotRules(self)
+
+
+def _parse_robots(robots_url: str, status: int | None, text: str) -> RobotFileParser:
+    rp = _RobotFileParser(robots_url)
+    # Mirrors RobotFileParser.read(): auth errors and unreachable hosts
+    # disallow everything, any other 4xx means there is no robots.txt.
+    if status is None or status in (401, 403) or status >= 500:
+        rp.disallow_all = True
+    elif status >= 400:
+        rp.allow_all = True
+    else:
+        rp.parse(text.split("\n"))
+    rp.modified()
+    return rp
+
+
+class RobotsManager:
+    """Async robots.txt fetcher with a per-origin cache shared by all callers.
+
+    Entries live for the response's Cache-Control max-age or Expires, capped
+    at ``ttl`` (24 hours by default, per RFC 9309) and kept for at least
+    ``min_ttl``, so ``no-cache`` or ``max-age=0`` does not mean a fetch per URL.
+    If ``cache_dir`` is set, responses are also persisted there and reused
+    across processes.
+
+    An unreachable host or a 5xx answer disallows the whole origin, so those
+    results are kept in memory for at most ``error_ttl`` and then retried.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 24 * 60 * 60,
+        cache_dir: Path | None = None,
+        timeout: int = 30,
+        maxsize: int = 1024,
+        error_ttl: float = 5 * 60,
+        min_ttl: float = 5 * 60,
+    ) -> None:
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.min_ttl = min_ttl
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.fetches = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._cache: LRUCache[str, RobotFileParser] = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._pending: dict[str, asyncio.Future[RobotFileParser]] = {}
+        self._session: AsyncSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_session(self) -> AsyncSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session_loop is not loop:
+            if self._session is not None:
+                close_abandoned_session(self._session, self._session_loop, self.logger)
+            self._session = AsyncSession(loop=loop)
+            self._session_loop = loop
+        return self._session
+
+    async def aclose(self) -> None:
+        session, loop = self._session, self._session_loop
+        self._session = None
+        self._session_loop = None
+        if session is None:
+            return
+        if loop is asyncio.get_running_loop():
+            await session.close()
+        else:
+            close_abandoned_session(session, loop, self.logger)
+
+    def _disk_path(self, robots_url: str) -> Path:
+        digest = hashlib.sha256(robots_url.encode()).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def _load_from_disk(self, robots_url: str) -> tuple[RobotFileParser, float] | None:
+        if self.cache_dir is None:
+            return None
+
+        path = self._disk_path(robots_url)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        remaining = entry["expires_at"] - time.time()
+        if remaining <= 0:
+            return None
+        return _parse_robots(robots_url, entry["status"], entry["text"]), remaining
+
+    def _store_on_disk(
+        self, robots_url: str, status: int | None, text: str, ttl: float
+    ) -> None:
+        if self.cache_dir is None or ttl <= 0:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "url": robots_url,
+            "status": status,
+            "text": text,
+            "expires_at": time.time() + ttl,
+        }
+        self._disk_path(robots_url).write_text(json.dumps(entry), encoding="utf-8")
+
+    async def _fetch(self, robots_url: str) -> tuple[RobotFileParser, float]:
+        self.fetches += 1
+        try:
+            response = await self._get_session().get(
+                robots_url, timeout=self.timeout, impersonate="chrome"
+            )
+        except Exception as exc:
+            self.logger.warning(f"Error while requesting {robots_url}: {exc}")
+            return _parse_robots(robots_url, None, ""), self.error_ttl
+
+        text = response.text if response.status_code < 400 else ""
+        ttl = max(cache_ttl(response.headers, self.ttl), min(self.min_ttl, self.ttl))
+        if response.status_code >= 500:
+            ttl = min(ttl, self.error_ttl)
+        else:
+            await asyncio.to_thread(
+                self._store_on_disk, robots_url, response.status_code, text, ttl
+            )
+        return _parse_robots(robots_url, response.status_code, text), ttl
+
+    async def _load(self, robots_url: str) -> RobotFileParser:
+        cached = await asyncio.to_thread(self._load_from_disk, robots_url)
+        if cached is None:
+            cached = await self._fetch(robots_url)
+
+        rp, ttl = cached
+        if ttl > 0:
+            self._cache.set(robots_url, rp, ttl=ttl)
+        return rp
+
+    async def _parser_for(self, url: str) -> RobotFileParser:
+        robots_url = robots_url_for(url)
+        rp = self._cache.get(robots_url)
+        if rp is not None:
+            return rp
+
+        # Concurrent callers share one fetch per origin; the entry is dropped
+        # as soon as it completes so the map only holds fetches in flight.
+        pending = self._pending.get(robots_url)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(robots_url))
+            self._pending[robots_url] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(robots_url, None))
+        return await asyncio.shield(pending)
+
+    async def get(self, url: str) -> RobotFileManager:
+        return RobotFileManager(url, rp=await self._parser_for(url))
+
+    async def can_fetch(self, url: str) -> bool:
+        return (await self._parser_for(url)).can_fetch("*", url)
+
+    async def filter_urls(self, urls: list[str]) -> list[str]:
+        robots_urls = [robots_url_for(url) for url in urls]
+        rules: dict[str, RobotRules] = {}
+        for url, robots_url in zip(urls, robots_urls):
+            if robots_url not in rules:
+                rules[robots_url] = (await self._parser_for(url)).rules
+        return [
+            url
+            for url, robots_url in zip(urls, robots_urls)
+            if rules[robots_url].can_fetch(url)
+        ]
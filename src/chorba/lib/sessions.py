@@ -0,0 +1,35 @@
+import asyncio
+import logging
+
+from curl_cffi._wrapper import lib
+from curl_cffi.requests import AsyncSession
+
+
+def close_abandoned_session(
+    session: AsyncSession, loop: asyncio.AbstractEventLoop, logger: logging.Logger
+) -> None:
+    """Close ``session``, created on ``loop``, from code running on another loop.
+
+    A loop still running in another thread closes the session itself. A loop
+    that has stopped, typically one ``asyncio.run`` already closed, can no
+    longer await ``session.close()``, so the curl handles and the connections
+    they hold are released directly; a warning is logged if that fails.
+    """
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+        return
+
+    try:
+        acurl = session._acurl
+        if acurl is not None and acurl._curlm is not None:
+            for curl in list(acurl._curl2future):
+                lib.curl_multi_remove_handle(acurl._curlm, curl._curl)
+            lib.curl_multi_cleanup(acurl._curlm)
+            acurl._curlm = None
+        session._closed = True
+        while not session.pool.empty():
+            curl = session.pool.get_nowait()
+            if curl is not None:
+                curl.close()
+    except Exception as exc:
+        logger.warning(f"Could not close an AsyncSession left on a stopped loop: {exc}")
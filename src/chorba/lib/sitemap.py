@@ -2,23 +2,281 @@ import re
 from urllib.parse import urljoin, urlparse
 from curl_cffi.requests import AsyncSession
 from curl_cffi.requests.exceptions import HTTPError
-from parsel import Selector
+from lxml import etree
 import logging
 import asyncio
-import gzip
+import contextlib
+import hashlib
+import json
+import time
+import zlib
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from chorba.lib.robot import RobotsManager
+
+
+@dataclass
+class SitemapFetchStats:
+    """Latency of the sitemap fetches made while walking one sitemap tree."""
+
+    fetches: int = 0
+    failures: int = 0
+    not_modified: int = 0
+    cache_hits: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.fetches += 1
+        if not ok:
+            self.failures += 1
+        self.latencies.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def describe(self) -> str:
+        return (
+            f"fetches={self.fetches} failures={self.failures} "
+            f"not_modified={self.not_modified} cache_hits={self.cache_hits} "
+            f"p50={self.percentile(0.5):.2f}s p95={self.percentile(0.95):.2f}s "
+            f"max={max(self.latencies, default=0.0):.2f}s"
+        )
+
+
+def _lastmod_sort_key(lastmod: str | None) -> float:
+    if not lastmod:
+        return float("inf")
+    try:
+        parsed = datetime.fromisoformat(lastmod)
+    except ValueError:
+        return float("inf")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return -parsed.timestamp()
+
+
+@dataclass
+class SitemapDocument:
+    """Parsed entries of one sitemap with the validators needed to revalidate it."""
+
+    url: str
+    entries: list[tuple[str, str, str | None]]
+    etag: str | None = None
+    last_modified: str | None = None
+    lastmod: str | None = None
+
+
+class SitemapCache:
+    """On-disk store of parsed sitemaps, one JSON file per sitemap URL.
+
+    Entries never expire on their own: they are revalidated with a conditional
+    request, or skipped entirely when the parent index reports the same
+    ``<lastmod>`` as when they were stored.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = cache_dir
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def load(self, url: str) -> SitemapDocument | None:
+        try:
+            data = json.loads(self._path(url).read_text(encoding="utf-8"))
+            data["entries"] = [tuple(entry) for entry in data["entries"]]
+            document = SitemapDocument(**data)
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        return document if document.url == url else None
+
+    def store(self, document: SitemapDocument) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(document.url)
+        partial = path.with_suffix(".tmp")
+        partial.write_text(json.dumps(asdict(document)), encoding="utf-8")
+        partial.replace(path)
+
+
+@dataclass
+class _SitemapWalk:
+    session: AsyncSession
+    queue: asyncio.Queue
+    stats: SitemapFetchStats
+    fetch_concurrency: int
+    cache: SitemapCache | None = None
+    limits: dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+    def limit_for(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in self.limits:
+            self.limits[host] = asyncio.Semaphore(max(self.fetch_concurrency, 1))
+        return self.limits[host]
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class GzipStreamDecoder:
+    """Incremental gzip decoder that also handles multi-member files."""
+
+    def __init__(self) -> None:
+        self._decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+    def decompress(self, chunk: bytes) -> bytes:
+        output = []
+        while chunk:
+            output.append(self._decompressor.decompress(chunk))
+            if not self._decompressor.eof:
+                break
+            chunk = self._decompressor.unused_data
+            if not chunk.startswith(GZIP_MAGIC):
+                break
+            self._decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        return b"".join(output)
+
+
+class SitemapStreamParser:
+    """Incremental sitemap parser that only keeps the current entry in memory.
+
+    ``feed`` accepts chunks of the document and returns ``(tag, loc, lastmod)``
+    tuples for every ``<url>`` and ``<sitemap>`` entry completed so far.
+    """
+
+    def __init__(self) -> None:
+        self._parser = etree.XMLPullParser(
+            events=("end",),
+            tag=("{*}url", "{*}sitemap"),
+            recover=True,
+            resolve_entities=False,
+            huge_tree=True,
+        )
+        self._started = False
+
+    def feed(self, data: str | bytes) -> list[tuple[str, str, str | None]]:
+        if not self._started:
+            data = data.lstrip()
+            if not data:
+                return []
+            self._started = True
+
+        self._parser.feed(data)
+        return self._read_entries()
+
+    def close(self) -> list[tuple[str, str, str | None]]:
+        if not self._started:
+            return []
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        return self._read_entries()
+
+    def _read_entries(self) -> list[tuple[str, str, str | None]]:
+        entries = []
+        for _, element in self._parser.read_events():
+            loc = lastmod = None
+            for child in element:
+                tag = child.tag
+                if not isinstance(tag, str):
+                    continue
+                name = tag[tag.rfind("}") + 1 :]
+                if name == "loc":
+                    loc = child.text
+                elif name == "lastmod":
+                    lastmod = child.text
+
+            if loc:
+                tag = element.tag
+                entries.append(
+                    (tag[tag.rfind("}") + 1 :], loc, lastmod and lastmod.strip())
+                )
+
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return entries
+
+
+_HTTP_URL_PATH = re.compile(r"https?://[^/?#]*([^?#]*)")
+_UNSAFE_URL_CHARS = frozenset("\t\r\n")
+
+
+def url_path(url: str) -> str:
+    """Return ``urlparse(url.strip()).path`` without building a ParseResult.
+
+    Plain ``http(s)://`` URLs, which is what sitemaps contain, take a single
+    regex match; anything else goes through ``urlparse``.
+    """
+    url = url.strip()
+    match = _HTTP_URL_PATH.match(url)
+    if match is None or not _UNSAFE_URL_CHARS.isdisjoint(url):
+        return urlparse(url).path
+
+    path = match.group(1)
+    # urlparse splits ``;params`` off the last path segment.
+    params = path.find(";", path.rfind("/"))
+    return path if params < 0 else path[:params]
+
+
+class RecipeUrlMatcher:
+    """Stateless recipe URL test for one parser class, shared by all instances."""
+
+    __slots__ = ("pattern", "_search")
+
+    def __init__(self, pattern: re.Pattern[str]) -> None:
+        self.pattern = pattern
+        self._search = pattern.search
+
+    def matches_path(self, path: str) -> bool:
+        return self._search(path) is not None
+
+    def __call__(self, url: str) -> bool:
+        return self._search(url_path(url)) is not None
+
+    def filter(self, urls: Iterable[str]) -> list[str]:
+        search = self._search
+        return [url for url in urls if search(url_path(url))]
 
 
 class BaseSitemapParser:
     recipe_path_pattern: re.Pattern[str]
-
-    def __init__(self, xml_url: str, max_depth: int = 3, timeout: int = 60) -> None:
+    url_matcher: RecipeUrlMatcher
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "recipe_path_pattern" in cls.__dict__:
+            cls.url_matcher = RecipeUrlMatcher(cls.recipe_path_pattern)
+
+    def __init__(
+        self,
+        xml_url: str,
+        max_depth: int = 3,
+        timeout: int = 60,
+        robots: RobotsManager | None = None,
+        fetch_concurrency: int = 4,
+        fetch_stats: SitemapFetchStats | None = None,
+        cache: SitemapCache | None = None,
+    ) -> None:
         self.xml_url = xml_url
         self.max_depth = max_depth
         self.timeout = timeout
+        self.robots = robots
+        self.fetch_concurrency = fetch_concurrency
+        self.fetch_stats = (
+            fetch_stats if fetch_stats is not None else SitemapFetchStats()
+        )
+        self.cache = cache
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def _is_valid_recipe_path(self, path: str) -> bool:
-        return bool(self.recipe_path_pattern.search(path))
+        return self.url_matcher.matches_path(path)
 
     @staticmethod
     def host() -> str:
@@ -32,86 +290,259 @@ class BaseSitemapParser:
     def user_agent(self, val: str):
         self._user_agent = val
 
-    async def _fetch_xml(self, url: str, session: AsyncSession) -> str | None:
+    async def _fetch_sitemap(
+        self, url: str, session: AsyncSession, cached: SitemapDocument | None = None
+    ) -> SitemapDocument | None:
+        """Fetch and parse ``url``, returning ``cached`` itself on 304 Not Modified."""
+        headers = {
+            "Accept": "application/xml, text/xml",
+            "Accept-Encoding": "gzip, deflate, br",
+        }
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
         try:
-            headers = {
-                "Accept": "application/xml, text/xml",
-                "Accept-Encoding": "gzip, deflate, br",
-            }
             response = await session.get(
-                url, timeout=self.timeout, headers=headers, impersonate="chrome"
+                url,
+                timeout=self.timeout,
+                headers=headers,
+                impersonate="chrome",
+                stream=True,
             )
-            response.raise_for_status()
-            if "application/x-gzip" in response.headers.get("content-type"):
-                content = gzip.decompress(response.content)
-                return content.decode()
-            return response.text
+            try:
+                if response.status_code == 304 and cached is not None:
+                    return cached
+                response.raise_for_status()
+                entries = await self._stream_entries(response)
+            finally:
+                await response.aclose()
         except HTTPError as exc:
             self.logger.error(f"Error while requesting {url}. Error code {exc.code}.")
             return None
 
-    def _parse_sitemap_urls(
-        self, xml: str, base_url: str
-    ) -> tuple[list[str], list[str]]:
-        selector = Selector(xml)
-
-        loc_elements = selector.xpath("//sitemap/loc | //url/loc")
+        return SitemapDocument(
+            url=url,
+            entries=entries,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
 
+    @staticmethod
+    async def _stream_entries(response) -> list[tuple[str, str, str | None]]:
+        """Feed the response body into the parser as it arrives.
+
+        libcurl already undoes ``Content-Encoding``, so a body that still starts
+        with the gzip magic number is a compressed file (``.xml.gz``) whatever
+        its URL or content type say, and is decompressed chunk by chunk.
+        """
+        parser = SitemapStreamParser()
+        entries = []
+        decoder = None
+        head = b""
+
+        async for chunk in response.aiter_content():
+            if head is not None:
+                head += chunk
+                if len(head) < len(GZIP_MAGIC):
+                    continue
+                chunk, head = head, None
+                if chunk.startswith(GZIP_MAGIC):
+                    decoder = GzipStreamDecoder()
+            if decoder is not None:
+                chunk = decoder.decompress(chunk)
+            entries.extend(parser.feed(chunk))
+
+        if head:
+            entries.extend(parser.feed(head))
+        entries.extend(parser.close())
+        return entries
+
+    def _split_entries(
+        self, entries: list[tuple[str, str, str | None]], base_url: str
+    ) -> tuple[list[str], list[tuple[str, str | None]]]:
         urls = []
-        subsitemap_urls = []
-
-        for loc_element in loc_elements:
-            url = loc_element.xpath("./text()").get()
-            if not url:
-                continue
-            parsed_url = urlparse(url.strip())
-            path = parsed_url.path
-
-            parent_tag_name = loc_element.xpath("name(..)").get()
-            if parent_tag_name == "sitemap":
-                subsitemap_urls.append(urljoin(base_url, url))
-            elif self._is_valid_recipe_path(path):
+        subsitemaps = []
+        matches = self.url_matcher
+
+        for tag, url, lastmod in entries:
+            if tag == "sitemap":
+                subsitemaps.append((urljoin(base_url, url), lastmod))
+            elif matches(url):
                 urls.append(url)
 
-        return urls, subsitemap_urls
+        return urls, subsitemaps
 
-    async def _process_sitemap(
-        self, url: str, session: AsyncSession, current_depth: int = 0
-    ) -> list[str]:
-        if current_depth >= self.max_depth:
-            self.logger.warning(f"Max depth reached for {url}")
-            return []
+    @staticmethod
+    def _parse_entries(
+        xml: str, chunk_size: int = 64 * 1024
+    ) -> list[tuple[str, str, str | None]]:
+        parser = SitemapStreamParser()
+        entries = []
+        for offset in range(0, len(xml), chunk_size):
+            entries.extend(parser.feed(xml[offset : offset + chunk_size]))
+        entries.extend(parser.close())
+        return entries
 
-        xml = await self._fetch_xml(url, session)
-        if not xml:
-            return []
+    def _parse_sitemap_urls(
+        self, xml: str, base_url: str, chunk_size: int = 64 * 1024
+    ) -> tuple[list[str], list[str]]:
+        entries = self._parse_entries(xml, chunk_size)
+        urls, subsitemaps = self._split_entries(entries, base_url)
+        return urls, [url for url, _ in subsitemaps]
+
+    async def _fetch_timed(
+        self, url: str, walk: _SitemapWalk, cached: SitemapDocument | None
+    ) -> SitemapDocument | None:
+        started = time.perf_counter()
+        document = None
+        try:
+            document = await self._fetch_sitemap(url, walk.session, cached)
+        finally:
+            walk.stats.record(time.perf_counter() - started, ok=document is not None)
+        if document is not None and document is cached:
+            walk.stats.not_modified += 1
+        return document
+
+    async def _load_document(
+        self, url: str, walk: _SitemapWalk, lastmod: str | None
+    ) -> SitemapDocument | None:
+        # The cache is read inside the host slot too: a load that finished out
+        # of order before it would hand out slots out of lastmod order.
+        async with walk.limit_for(url):
+            if walk.cache is None:
+                return await self._fetch_timed(url, walk, None)
+
+            cached = await asyncio.to_thread(walk.cache.load, url)
+            if cached is not None and lastmod is not None and cached.lastmod == lastmod:
+                walk.stats.cache_hits += 1
+                return cached
+
+            document = await self._fetch_timed(url, walk, cached)
+
+        if document is not None:
+            document.lastmod = lastmod
+            await asyncio.to_thread(walk.cache.store, document)
+        return document
+
+    async def _walk_sitemap(
+        self,
+        url: str,
+        walk: _SitemapWalk,
+        path: tuple[int, ...] = (),
+        lastmod: str | None = None,
+    ) -> None:
+        if len(path) >= self.max_depth:
+            self.logger.warning(f"Max depth reached for {url}")
+            return
 
-        urls, subsitemap_urls = self._parse_sitemap_urls(xml, url)
+        document = await self._load_document(url, walk, lastmod)
+        if document is None:
+            return
 
-        if subsitemap_urls:
-            subsitemap_tasks = [
-                self._process_subsitemap(subsitemap_url, session, current_depth)
-                for subsitemap_url in subsitemap_urls
-            ]
-            subsitemap_results = await asyncio.gather(*subsitemap_tasks)
+        urls, subsitemaps = self._split_entries(document.entries, url)
+        del document
+        if urls:
+            await walk.queue.put((path, urls))
 
-            for result in subsitemap_results:
-                urls.extend(result)
+        # Newest sub-sitemaps first; the per-host semaphore hands out slots in
+        # the order the tasks start waiting, so this is also the fetch order.
+        ordered = sorted(
+            enumerate(subsitemaps), key=lambda item: _lastmod_sort_key(item[1][1])
+        )
+        await asyncio.gather(
+            *(
+                self._walk_subsitemap(
+                    subsitemap_url, walk, path + (index,), subsitemap_lastmod
+                )
+                for index, (subsitemap_url, subsitemap_lastmod) in ordered
+            )
+        )
 
-        return urls
+    async def _walk_subsitemap(
+        self,
+        subsitemap_url: str,
+        walk: _SitemapWalk,
+        path: tuple[int, ...],
+        lastmod: str | None,
+    ) -> None:
+        if self.robots is not None and not await self.robots.can_fetch(subsitemap_url):
+            self.logger.info(f"Skipping {subsitemap_url} disallowed by robots.txt")
+            return
+
+        parser_class = SitemapParserFactory.parser_class_for(subsitemap_url)
+        if type(self) is parser_class:
+            subsitemap_parser = self
+        else:
+            subsitemap_parser = parser_class(subsitemap_url, robots=self.robots)
+
+        await subsitemap_parser._walk_sitemap(subsitemap_url, walk, path, lastmod)
+
+    async def _iter_url_batches(
+        self, max_pending: int = 16
+    ) -> AsyncIterator[tuple[tuple[int, ...], list[str]]]:
+        """Yield ``(path, urls)`` per parsed sitemap while the tree is still walked.
+
+        ``path`` is the position of the sitemap in the index tree, so sorting the
+        batches by it restores document order.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        done = object()
 
-    async def _process_subsitemap(
-        self, subsitemap_url: str, session: AsyncSession, current_depth: int
-    ) -> list[str]:
-        subsitemap_parser = SitemapParserFactory.from_xml_url(subsitemap_url)
+        async with AsyncSession() as session:
+            walk = _SitemapWalk(
+                session=session,
+                queue=queue,
+                stats=self.fetch_stats,
+                fetch_concurrency=self.fetch_concurrency,
+                cache=self.cache,
+            )
 
-        return await subsitemap_parser._process_sitemap(
-            subsitemap_url, session, current_depth + 1
-        )
+            async def run_walk() -> None:
+                try:
+                    await self._walk_sitemap(self.xml_url, walk)
+                except Exception:
+                    await queue.put(done)
+                    raise
+                await queue.put(done)
+
+            walker = asyncio.create_task(run_walk())
+            try:
+                while (batch := await queue.get()) is not done:
+                    yield batch
+                await walker
+            finally:
+                if not walker.done():
+                    walker.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await walker
+                self.logger.info(
+                    f"Sitemap fetches for {self.xml_url}: {walk.stats.describe()}"
+                )
+
+    async def iter_recipe_url_batches(self) -> AsyncIterator[list[str]]:
+        """Yield the recipe URLs of each sitemap as soon as it is parsed.
+
+        Sub-sitemaps are fetched concurrently, so batches come out in completion
+        order rather than document order; use ``get_recipe_urls`` when the
+        order matters.
+        """
+        async for _, urls in self._iter_url_batches():
+            yield urls
+
+    async def iter_recipe_urls(self) -> AsyncIterator[str]:
+        """Yield recipe URLs one by one, as ``iter_recipe_url_batches`` does."""
+        async for urls in self.iter_recipe_url_batches():
+            for url in urls:
+                yield url
 
     async def get_recipe_urls(self) -> list[str]:
-        async with AsyncSession() as session:
-            return await self._process_sitemap(self.xml_url, session)
+        batches = [batch async for batch in self._iter_url_batches()]
+        batches.sort(key=lambda batch: batch[0])
+
+        return [url for _, urls in batches for url in urls]
 
 
 class GenericSitemapParser(BaseSitemapParser):
@@ -224,10 +655,32 @@ class SitemapParserFactory:
     }
 
     @classmethod
-    def from_xml_url(cls, url: str) -> BaseSitemapParser:
-        domain = urlparse(url).netloc.lower()
-        domain = domain.split("www.")[1] if domain.startswith("www.") else domain
+    def parser_class_for(cls, url: str) -> type[BaseSitemapParser]:
+        """Return the parser registered for ``url``'s host or a parent domain.
+
+        ``url`` may also be a bare host; ``cooking.nytimes.com`` resolves to the
+        ``nytimes.com`` parser.
+        """
+        if "://" in url:
+            host = urlparse(url).hostname or ""
+        else:
+            host = url.split(":", 1)[0].lower()
+
+        labels = host.split(".")
+        for index in range(len(labels) - 1):
+            parser_class = cls.SITEMAPS.get(".".join(labels[index:]))
+            if parser_class is not None:
+                return parser_class
+        return GenericSitemapParser
+
+    @classmethod
+    def matcher_for(cls, url: str) -> RecipeUrlMatcher:
+        return cls.parser_class_for(url).url_matcher
 
-        parser_class = cls.SITEMAPS.get(domain, GenericSitemapParser)
+    @classmethod
+    def from_xml_url(
+        cls, url: str, robots: RobotsManager | None = None, **kwargs
+    ) -> BaseSitemapParser:
+        parser_class = cls.parser_class_for(url)
 
-        return parser_class(url)
+        return parser_class(url, robots=robots, **kwargs)
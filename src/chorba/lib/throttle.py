@@ -0,0 +1,100 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    """Async token bucket; a ``rate`` of ``None`` means unlimited."""
+
+    def __init__(
+        self,
+        rate: float | None,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate is None:
+            return
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def rate_for_crawl_delay(crawl_delay: float, default_rate: float | None) -> float | None:
+    if crawl_delay > 0:
+        return 1 / crawl_delay
+    if default_rate is None or default_rate <= 0:
+        return None
+    return default_rate
+
+
+class HostScheduler:
+    """Per-host workers paced by a token bucket, under a global in-flight cap."""
+
+    def __init__(
+        self,
+        *,
+        per_host_concurrency: int = 4,
+        default_rate: float | None = None,
+        max_in_flight: int = 16,
+    ) -> None:
+        self.per_host_concurrency = max(per_host_concurrency, 1)
+        self.default_rate = default_rate
+        self._in_flight = asyncio.Semaphore(max(max_in_flight, 1))
+
+    async def run(
+        self,
+        items: Iterable[T],
+        fetch: Callable[[T], Awaitable[R]],
+        process: Callable[[T, R], Awaitable[None]] | None = None,
+        *,
+        crawl_delay: float = 0,
+    ) -> None:
+        """Run ``fetch`` for every item, then ``process`` on its result.
+
+        Only ``fetch`` holds an in-flight slot, so CPU-bound processing does
+        not cap network concurrency. The host's token is taken before the
+        slot, so a host waiting out its crawl delay never holds a slot that
+        other hosts could use.
+        """
+        items = list(items)
+        if not items:
+            return
+
+        bucket = TokenBucket(rate_for_crawl_delay(crawl_delay, self.default_rate))
+        pending = iter(items)
+
+        async def worker() -> None:
+            for item in pending:
+                await bucket.acquire()
+                async with self._in_flight:
+                    result = await fetch(item)
+                if process is not None:
+                    await process(item, result)
+
+        await asyncio.gather(
+            *(worker() for _ in range(min(self.per_host_concurrency, len(items))))
+        )
@@ -1,15 +1,59 @@
-from fastapi import APIRouter
+import os
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 
 from chorba.web.models import RecipeResponse
-from chorba.lib.markup.scraper import RecipeScraper
+from chorba.lib.fetch_cache import CacheMissError, HtmlCache
+from chorba.lib.markup.engine import ExtractionEngine
+from chorba.lib.markup.scraper import FetchDisallowedError, RecipeScraper
+from chorba.lib.robot import RobotsManager
 
 router = APIRouter()
 
-recipe_scraper = RecipeScraper()
+HTML_CACHE_DIR = os.environ.get("CHORBA_HTML_CACHE_DIR")
+HTML_CACHE_MAX_BYTES = int(
+    os.environ.get("CHORBA_HTML_CACHE_MAX_BYTES", str(1024**3))
+)
+OFFLINE = os.environ.get("CHORBA_OFFLINE", "") not in ("", "0")
+html_cache = (
+    HtmlCache(Path(HTML_CACHE_DIR), max_bytes=HTML_CACHE_MAX_BYTES, offline=OFFLINE)
+    if HTML_CACHE_DIR
+    else None
+)
+
+EARLY_STOP = os.environ.get("CHORBA_EARLY_STOP", "") not in ("", "0")
+MAX_HTML_BYTES = os.environ.get("CHORBA_MAX_HTML_BYTES")
+
+robots_manager = RobotsManager()
+recipe_scraper = RecipeScraper(
+    robots=robots_manager,
+    html_cache=html_cache,
+    early_stop=EARLY_STOP,
+    max_html_bytes=int(MAX_HTML_BYTES) if MAX_HTML_BYTES else None,
+)
+
+EXTRACTION_WORKERS = int(os.environ.get("CHORBA_EXTRACTION_WORKERS", "0"))
+extraction_engine = (
+    ExtractionEngine(max_workers=EXTRACTION_WORKERS) if EXTRACTION_WORKERS > 0 else None
+)
 
 
 @router.get("/recipe", response_model=RecipeResponse)
 async def get_recipe(url: str):
-    recipe = recipe_scraper.scrape_from_url(url)
+    try:
+        if extraction_engine is None:
+            recipe = await recipe_scraper.scrape_from_url(url)
+
+            return RecipeResponse(recipe=recipe)
+
+        html = await recipe_scraper.fetch_html(url)
+    except FetchDisallowedError as exc:
+        raise HTTPException(status_code=403, detail=str(exc))
+    except CacheMissError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
+
+    recipe_data = await extraction_engine.extract(html)
 
-    return RecipeResponse(recipe=recipe)
+    return JSONResponse({"recipe": recipe_data})
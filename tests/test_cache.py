@@ -0,0 +1,55 @@
+from chorba.lib.cache import LRUCache, cache_ttl
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 9
+    assert cache.get("a") == 1
+
+    clock.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache(maxsize=4)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+
+    stats = cache.stats()
+
+    assert (stats.hits, stats.misses, stats.size, stats.maxsize) == (2, 1, 1, 4)
+
+
+def test_cache_ttl_is_capped_by_default_ttl():
+    assert cache_ttl({"cache-control": "public, max-age=60"}, 3600) == 60
+    assert cache_ttl({"cache-control": "max-age=999999"}, 3600) == 3600
+    assert cache_ttl({"cache-control": "no-cache"}, 3600) == 0
+    assert cache_ttl({}, 3600) == 3600
@@ -0,0 +1,157 @@
+import asyncio
+import gzip
+import os
+from pathlib import Path
+
+import pytest
+
+from chorba.lib.fetch_cache import CacheMissError, HtmlCache
+from chorba.lib.markup.scraper import RecipeScraper
+
+
+def test_store_and_lookup_round_trip_with_shared_blobs(tmp_path):
+    cache = HtmlCache(tmp_path)
+
+    first = cache.store("https://a.test/1", "<html>same</html>", {"etag": '"v1"'})
+    cache.store("https://a.test/2", "<html>same</html>", {})
+
+    page = cache.lookup("https://a.test/1")
+    assert page.html == "<html>same</html>"
+    assert page.digest == first.digest
+    assert page.validators() == {"If-None-Match": '"v1"'}
+    assert page.is_fresh()
+    assert cache.lookup("https://a.test/2").digest == first.digest
+    assert len(list((tmp_path / "blobs").glob("*/*.html.gz"))) == 1
+    assert cache.lookup("https://a.test/missing") is None
+
+
+def test_store_uses_cache_control_for_freshness(tmp_path):
+    cache = HtmlCache(tmp_path, ttl=3600)
+
+    page = cache.store(
+        "https://a.test/1", "<html></html>", {"cache-control": "no-cache"}
+    )
+
+    assert not page.is_fresh()
+    refreshed = cache.refresh(page, {"cache-control": "max-age=60"})
+    assert refreshed.is_fresh()
+    assert not refreshed.is_fresh(now=refreshed.fetched_at + 61)
+
+
+def test_eviction_drops_least_recently_used_blobs(tmp_path):
+    cache = HtmlCache(tmp_path, low_water=1.0)
+    blobs = []
+    for index in range(3):
+        html = f"<html>{'x' * 500}{index}</html>"
+        page = cache.store(f"https://a.test/{index}", html, {})
+        blobs.append(cache._blob_path(page.digest))
+        os.utime(blobs[-1], (index, index))
+
+    assert cache.lookup("https://a.test/0") is not None
+    cache.max_bytes = 2 * blobs[0].stat().st_size
+    cache.store("https://a.test/3", f"<html>{'x' * 500}3</html>", {})
+
+    assert cache.lookup("https://a.test/1") is None
+    assert cache.lookup("https://a.test/2") is None
+    assert cache.lookup("https://a.test/0") is not None
+    assert cache.lookup("https://a.test/3") is not None
+    assert len(list((tmp_path / "pages").glob("*/*.json"))) == 2
+
+
+def test_eviction_frees_space_down_to_the_low_water_mark(tmp_path, monkeypatch):
+    def html(index: int) -> str:
+        return f"<html>{'x' * 500}{index:02d}</html>"
+
+    blob_size = len(gzip.compress(html(0).encode()))
+    cache = HtmlCache(tmp_path, max_bytes=int(10.5 * blob_size))
+    for index in range(11):
+        cache.store(f"https://a.test/{index}", html(index), {})
+
+    assert cache._blob_bytes == 9 * blob_size
+
+    scans = []
+    scan_blobs = cache._scan_blobs
+    monkeypatch.setattr(cache, "_scan_blobs", lambda: scans.append(1) or scan_blobs())
+    cache.store("https://a.test/11", html(11), {})
+
+    assert scans == []
+
+
+def test_store_rewrites_a_blob_evicted_after_the_existence_check(tmp_path, monkeypatch):
+    cache = HtmlCache(tmp_path)
+    page = cache.store("https://a.test/0", "<html>same</html>", {})
+    blob_path = cache._blob_path(page.digest)
+    utime = os.utime
+
+    def evicted_meanwhile(path, *args):
+        # Another thread's eviction removes the blob just before the touch.
+        Path(path).unlink(missing_ok=True)
+        utime(path, *args)
+
+    monkeypatch.setattr("chorba.lib.fetch_cache.os.utime", evicted_meanwhile)
+    cache.store("https://a.test/1", "<html>same</html>", {})
+    monkeypatch.undo()
+
+    assert blob_path.exists()
+    assert cache.lookup("https://a.test/1").html == "<html>same</html>"
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str = "", headers: dict | None = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, response: FakeResponse):
+        self.response = response
+        self.requests = []
+
+    async def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, headers))
+        return self.response
+
+
+def fetch(scraper: RecipeScraper, session: FakeSession, url: str) -> str:
+    scraper._get_session = lambda: session
+    return asyncio.run(scraper.fetch_html(url))
+
+
+def test_fetch_html_serves_fresh_pages_from_cache(tmp_path):
+    cache = HtmlCache(tmp_path)
+    scraper = RecipeScraper(html_cache=cache)
+    session = FakeSession(FakeResponse(200, "<html>live</html>"))
+
+    assert fetch(scraper, session, "https://a.test/r") == "<html>live</html>"
+    assert fetch(scraper, session, "https://a.test/r") == "<html>live</html>"
+    assert len(session.requests) == 1
+
+
+def test_fetch_html_revalidates_stale_pages(tmp_path):
+    cache = HtmlCache(tmp_path)
+    cache.store(
+        "https://a.test/r",
+        "<html>cached</html>",
+        {"etag": '"v1"', "cache-control": "no-cache"},
+    )
+    scraper = RecipeScraper(html_cache=cache)
+    session = FakeSession(FakeResponse(304, headers={"cache-control": "max-age=60"}))
+
+    assert fetch(scraper, session, "https://a.test/r") == "<html>cached</html>"
+    assert session.requests == [("https://a.test/r", {"If-None-Match": '"v1"'})]
+    assert cache.lookup("https://a.test/r").is_fresh()
+
+
+def test_fetch_html_offline_serves_stale_pages_and_raises_on_miss(tmp_path):
+    cache = HtmlCache(tmp_path, offline=True)
+    cache.store(
+        "https://a.test/r", "<html>cached</html>", {"cache-control": "no-store"}
+    )
+    scraper = RecipeScraper(html_cache=cache)
+    session = FakeSession(FakeResponse(200, "<html>live</html>"))
+
+    assert fetch(scraper, session, "https://a.test/r") == "<html>cached</html>"
+    with pytest.raises(CacheMissError):
+        fetch(scraper, session, "https://a.test/other")
+    assert session.requests == []
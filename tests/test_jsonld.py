@@ -0,0 +1,214 @@
+from pathlib import Path
+
+import extruct
+import pytest
+
+from chorba.lib.markup import scraper as scraper_module
+from chorba.lib.markup._jsonld import (
+    JsonLdGraph,
+    JsonLdStreamScanner,
+    extract_jsonld,
+    iter_jsonld_scripts,
+)
+from chorba.lib.markup._processors import JSONLDProcessor
+from chorba.lib.markup._schema_org import Recipe
+from chorba.lib.markup.scraper import RecipeScraper
+
+
+HTML_FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+
+@pytest.mark.parametrize(
+    "fixture", sorted(HTML_FIXTURES.glob("*.html")), ids=lambda path: path.stem
+)
+def test_extract_jsonld_matches_extruct(fixture):
+    html = fixture.read_text(encoding="utf-8")
+
+    assert extract_jsonld(html) == extruct.extract(html, syntaxes=["json-ld"])[
+        "json-ld"
+    ]
+
+
+def test_iter_jsonld_scripts_finds_only_real_ld_json_tags():
+    html = """
+    <html><head>
+    <title>a <script type="application/ld+json">{"in": "title"}</script></title>
+    <!-- <script type="application/ld+json">{"in": "comment"}</script> -->
+    <script>
+      document.write('<script type="application/ld+json">{"in": "js"}<\\/script>');
+    </script>
+    <script data-type="application/ld+json">{"in": "data-type"}</script>
+    <script type="application/json">{"in": "json"}</script>
+    <SCRIPT TYPE='application/ld+json'>{"in": "upper"}</SCRIPT >
+    <script async type=application/ld+json>{"in": "unquoted"}</script>
+    <script id="x>y" type="application/ld+json">{"in": "quoted-gt"}</script>
+    </head><body>
+    <script type="application/ld+json">{"in": "</b>"}</script>
+    </body></html>
+    """
+
+    scripts = list(iter_jsonld_scripts(html))
+    assert scripts == [
+        '{"in": "upper"}',
+        '{"in": "unquoted"}',
+        '{"in": "quoted-gt"}',
+        '{"in": "</b>"}',
+    ]
+    assert extract_jsonld(html) == extruct.extract(html, syntaxes=["json-ld"])[
+        "json-ld"
+    ]
+
+
+def test_extract_jsonld_flattens_lists_and_skips_invalid_blocks():
+    html = """
+    <script type="application/ld+json">[{"@type": "Person"}, {}]</script>
+    <script type="application/ld+json">{"@type": "Recipe",}</script>
+    <script type="application/ld+json">"text"</script>
+    <script type="application/ld+json">{"@type": "WebSite"}</script>
+    """
+
+    assert extract_jsonld(html) == [{"@type": "Person"}, {"@type": "WebSite"}]
+
+
+def test_scrape_falls_back_to_extruct_for_blocks_json_cannot_parse(monkeypatch):
+    monkeypatch.setattr(scraper_module, "Recipe", dict)
+    html = """
+    <script type="application/ld+json">
+    // generated by a recipe plugin
+    {"@context": "https://schema.org", "@type": "Recipe", "name": "Toast"}
+    </script>
+    """
+
+    assert extract_jsonld(html) == []
+    assert RecipeScraper(max_workers=1).scrape(html)["name"] == "Toast"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 256])
+def test_stream_scanner_reports_each_closed_block(chunk_size):
+    html = (HTML_FIXTURES / "jsonld-article-microdata-recipe.html").read_text()
+    html = html.replace("</body>", '<script type="application/ld+json">{}</SCRIPT>')
+    scanner = JsonLdStreamScanner()
+    closed_at = []
+
+    for offset in range(0, len(html), chunk_size):
+        if scanner.feed(html[offset : offset + chunk_size]):
+            closed_at.append(offset + chunk_size)
+
+    first_end = html.index("</script>") + len("</script>")
+    second_end = html.index("</SCRIPT>") + len("</SCRIPT>")
+    assert len(closed_at) == 2
+    assert first_end <= closed_at[0] < first_end + chunk_size
+    assert second_end <= closed_at[1] < second_end + chunk_size
+    assert scanner.html == html
+
+
+YOAST_GRAPH = [
+    {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "Article",
+                "@id": "https://a.test/r/#article",
+                "author": {
+                    "@type": "Person",
+                    "@id": "https://a.test/#/person/1",
+                    "name": "Dana Reyes",
+                    "image": {"@id": "https://a.test/#/person/1/avatar"},
+                },
+            },
+            {
+                "@type": "ImageObject",
+                "@id": "https://a.test/r/#primaryimage",
+                "url": "https://a.test/lemon-chicken.jpg",
+            },
+            {
+                "@type": "ImageObject",
+                "@id": "https://a.test/#/person/1/avatar",
+                "url": "https://a.test/dana.jpg",
+            },
+            {
+                "@context": "https://schema.org",
+                "@graph": [
+                    {
+                        "@type": ["schema:Recipe", "HowTo"],
+                        "@id": "https://a.test/r/#recipe",
+                        "name": "Sheet Pan Lemon Chicken",
+                        "author": {"@id": "https://a.test/#/person/1"},
+                        "image": [{"@id": "https://a.test/r/#primaryimage"}],
+                        "video": {"@id": "https://a.test/r/#video"},
+                        "isPartOf": {"@id": "https://a.test/r/#article"},
+                    },
+                    {
+                        "@type": "https://schema.org/VideoObject",
+                        "@id": "https://a.test/r/#video",
+                        "contentUrl": "https://videos.test/lemon-chicken.mp4",
+                        "thumbnail": {"@id": "https://a.test/r/#primaryimage"},
+                    },
+                ],
+            },
+        ],
+    }
+]
+
+
+def test_graph_indexes_nested_graph_nodes_by_type_and_id():
+    graph = JsonLdGraph(YOAST_GRAPH)
+
+    (recipe,) = graph.nodes_of_type("Recipe")
+    assert recipe["name"] == "Sheet Pan Lemon Chicken"
+    assert graph.nodes_of_type("HowTo") == [recipe]
+    assert [node["@id"] for node in graph.nodes_of_type("ImageObject")] == [
+        "https://a.test/r/#primaryimage",
+        "https://a.test/#/person/1/avatar",
+    ]
+    # Embedded nodes resolve by @id but are not page-level nodes.
+    assert graph.get("https://a.test/#/person/1")["name"] == "Dana Reyes"
+    assert graph.nodes_of_type("Person") == []
+    assert graph.nodes_of_type("Missing") == []
+
+
+def test_graph_resolves_references_without_modifying_nodes():
+    graph = JsonLdGraph(YOAST_GRAPH)
+    recipe = graph.nodes_of_type("Recipe")[0]
+
+    author = graph.resolve(recipe["author"])
+    assert author["name"] == "Dana Reyes"
+    assert author["image"]["url"] == "https://a.test/dana.jpg"
+    assert graph.resolve(recipe["image"]) == [
+        graph.get("https://a.test/r/#primaryimage")
+    ]
+    assert recipe["author"] == {"@id": "https://a.test/#/person/1"}
+
+    unknown = {"@id": "https://elsewhere.test/#thing"}
+    assert graph.resolve(unknown) == unknown
+
+
+def test_graph_resolve_stops_at_reference_cycles():
+    graph = JsonLdGraph(
+        [
+            {"@id": "#a", "@type": "Thing", "next": {"@id": "#b"}},
+            {"@id": "#b", "@type": "Thing", "next": {"@id": "#a"}},
+        ]
+    )
+
+    resolved = graph.resolve({"@id": "#a"}, depth=3)
+    assert resolved["next"]["@id"] == "#b"
+    assert resolved["next"]["next"]["next"]["next"] == {"@id": "#a"}
+
+
+def test_jsonld_processor_resolves_recipe_references():
+    recipe = Recipe(JSONLDProcessor().extract_recipe(YOAST_GRAPH))
+
+    assert recipe.title == "Sheet Pan Lemon Chicken"
+    assert recipe.video_url == "https://videos.test/lemon-chicken.mp4"
+    assert recipe.thumbnail_url == "https://a.test/lemon-chicken.jpg"
+
+
+def test_jsonld_processor_attaches_single_unreferenced_video():
+    data = [
+        {"@type": "Recipe", "name": "Toast"},
+        {"@type": "VideoObject", "embedUrl": "https://videos.test/toast"},
+    ]
+
+    assert JSONLDProcessor().extract_recipe(data)["video"] == data[1]
+    assert "video" not in JSONLDProcessor().extract_recipe(data + data[1:])
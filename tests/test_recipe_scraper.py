@@ -0,0 +1,319 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import extruct
+import pytest
+
+from chorba.lib.fetch_cache import HtmlCache
+from chorba.lib.markup import scraper as scraper_module
+from chorba.lib.markup.engine import extract_recipe_dict
+from chorba.lib.markup.scraper import RecipeScraper
+
+
+def test_scrape_from_url_offloads_extraction_from_event_loop(monkeypatch):
+    scraper = RecipeScraper(max_workers=1)
+    scrape_threads = []
+
+    async def fake_fetch_html(url: str) -> str:
+        return "<html></html>"
+
+    def fake_scrape(html: str):
+        scrape_threads.append(threading.current_thread())
+        return None
+
+    monkeypatch.setattr(scraper, "fetch_html", fake_fetch_html)
+    monkeypatch.setattr(scraper, "scrape", fake_scrape)
+
+    async def run():
+        try:
+            return await scraper.scrape_from_url("https://example.com/recipe")
+        finally:
+            await scraper.aclose()
+
+    assert asyncio.run(run()) is None
+    assert len(scrape_threads) == 1
+    assert scrape_threads[0] is not threading.main_thread()
+
+
+def test_scrape_html_can_leave_ingredients_for_the_caller():
+    scraper = RecipeScraper(max_workers=1)
+    html = """<script type="application/ld+json">
+    {"@type": "Recipe", "name": "Toast", "recipeIngredient": ["1 slice bread"]}
+    </script>"""
+
+    async def run():
+        try:
+            return (
+                await scraper.scrape_html(html),
+                await scraper.scrape_html(html, prepare=False),
+            )
+        finally:
+            await scraper.aclose()
+
+    prepared, unprepared = asyncio.run(run())
+
+    assert {"ingredients", "directions"} <= prepared.__dict__.keys()
+    assert not {"ingredients", "directions"} & unprepared.__dict__.keys()
+
+
+def test_session_from_a_finished_loop_is_closed_when_replaced():
+    scraper = RecipeScraper(max_workers=1)
+
+    async def open_session():
+        session = scraper._get_session()
+        session.acurl
+        return session
+
+    first = asyncio.run(open_session())
+    try:
+        second = asyncio.run(open_session())
+    finally:
+        asyncio.run(scraper.aclose())
+
+    assert second is not first
+    assert first._closed
+    assert first.acurl._curlm is None
+
+
+def test_extract_recipe_dict_returns_serialized_recipe():
+    html = """
+    <html><head>
+    <script type="application/ld+json">
+    {"@context": "https://schema.org", "@type": "Recipe", "name": "Toast", "prepTime": "PT5M"}
+    </script>
+    </head><body></body></html>
+    """
+
+    assert extract_recipe_dict(html) == {
+        "title": "Toast",
+        "ingredients": [],
+        "directions": [],
+        "time": {"valueMs": 300000, "valueFormatted": "5 min"},
+        "video_url": None,
+        "thumbnail_url": None,
+    }
+
+
+def test_extract_recipe_dict_returns_none_without_recipe():
+    assert extract_recipe_dict("<html><body>No recipe here.</body></html>") is None
+
+
+HTML_FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+
+def _unordered(value):
+    # RDFa extraction returns multi-valued properties in arbitrary order.
+    if isinstance(value, dict):
+        return {key: _unordered(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return sorted((_unordered(item) for item in value), key=json.dumps)
+    return value
+
+
+def _full_pass_recipe(scraper: RecipeScraper, html: str) -> dict:
+    extracted = extruct.extract(html, syntaxes=scraper.syntax_names)
+    for processor in scraper._processors:
+        data = extracted.get(processor.syntax_name)
+        if data and (recipe_data := processor.extract_recipe(data)):
+            return recipe_data
+    return {}
+
+
+@pytest.mark.parametrize(
+    "fixture", sorted(HTML_FIXTURES.glob("*.html")), ids=lambda path: path.stem
+)
+def test_scrape_matches_full_extruct_pass(monkeypatch, fixture):
+    monkeypatch.setattr(scraper_module, "Recipe", dict)
+    scraper = RecipeScraper(max_workers=1)
+    html = fixture.read_text(encoding="utf-8")
+
+    expected = _full_pass_recipe(scraper, html)
+    assert _unordered(scraper.scrape(html) or {}) == _unordered(expected)
+
+
+def test_scrape_extracts_syntaxes_lazily_from_one_parse(monkeypatch):
+    monkeypatch.setattr(scraper_module, "Recipe", dict)
+    extracted_syntaxes = []
+    documents = []
+    parsed = []
+    extract = extruct.extract
+    parse = scraper_module.parse_xmldom_html
+
+    def recording_extract(document, syntaxes):
+        extracted_syntaxes.extend(syntaxes)
+        documents.append(document)
+        return extract(document, syntaxes=syntaxes)
+
+    def recording_parse(html, encoding):
+        parsed.append(html)
+        return parse(html, encoding)
+
+    monkeypatch.setattr(scraper_module.extruct, "extract", recording_extract)
+    monkeypatch.setattr(scraper_module, "parse_xmldom_html", recording_parse)
+    scraper = RecipeScraper(max_workers=1)
+
+    def scrape(name: str) -> dict | None:
+        extracted_syntaxes.clear()
+        documents.clear()
+        parsed.clear()
+        return scraper.scrape((HTML_FIXTURES / name).read_text(encoding="utf-8"))
+
+    assert scrape("jsonld-graph.html")["name"] == "Sheet Pan Lemon Chicken"
+    assert extracted_syntaxes == []
+    assert parsed == []
+
+    assert scrape("article-no-recipe.html") is None
+    assert extracted_syntaxes == ["json-ld"]
+
+    assert scrape("jsonld-article-microdata-recipe.html")["name"] == (
+        "Grandma's Banana Bread"
+    )
+    assert extracted_syntaxes == ["json-ld", "microdata"]
+    assert len(parsed) == 1
+    assert documents[0] is documents[1]
+
+    assert scrape("rdfa.html")["name"] == "Tomato Soup"
+    assert extracted_syntaxes == ["rdfa"]
+    assert len(parsed) == 1
+
+
+class StreamingResponse:
+    def __init__(self, body: bytes, chunk_size: int, encoding: str = "utf-8"):
+        self.status_code = 200
+        self.headers = {}
+        self.encoding = encoding
+        self.body = body
+        self.chunk_size = chunk_size
+        self.sent = 0
+        self.closed = False
+        self.quit_now = asyncio.Event()
+
+    async def aiter_content(self):
+        while self.sent < len(self.body):
+            chunk = self.body[self.sent : self.sent + self.chunk_size]
+            self.sent += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def stream(scraper: RecipeScraper, response: StreamingResponse) -> str:
+    async def get(url, **kwargs):
+        assert kwargs["stream"] is True
+        return response
+
+    scraper._get_session = lambda: type("Session", (), {"get": staticmethod(get)})
+    return asyncio.run(scraper.fetch_html("https://example.com/recipe"))
+
+
+def test_early_stop_abandons_page_after_jsonld_recipe(monkeypatch):
+    monkeypatch.setattr(scraper_module, "Recipe", dict)
+    html = (HTML_FIXTURES / "jsonld-graph.html").read_text(encoding="utf-8")
+    html = html.replace("</body>", "<p>Comment</p>" * 5000 + "</body>")
+    response = StreamingResponse(html.encode(), chunk_size=512)
+    scraper = RecipeScraper(max_workers=1, early_stop=True)
+
+    partial = stream(scraper, response)
+
+    recipe_end = html.index("</script>") + len("</script>")
+    assert recipe_end <= len(partial) < recipe_end + 512
+    assert response.sent < len(response.body) / 10
+    assert response.quit_now.is_set()
+    assert response.closed
+    assert scraper.scrape(partial) == scraper.scrape(html)
+
+
+def test_early_stop_reads_pages_without_jsonld_recipe_to_the_end():
+    html = (HTML_FIXTURES / "jsonld-article-microdata-recipe.html").read_text()
+    response = StreamingResponse(html.encode("cp1252"), 16, encoding="cp1252")
+
+    assert stream(RecipeScraper(early_stop=True), response) == html
+    assert not response.quit_now.is_set()
+
+
+def test_max_html_bytes_caps_streamed_pages():
+    response = StreamingResponse("é".encode() * 1000, chunk_size=300)
+
+    assert stream(RecipeScraper(max_html_bytes=1001), response) == "é" * 500
+    assert response.sent == 1200
+    assert response.quit_now.is_set()
+    assert response.closed
+
+
+def test_early_stopped_pages_are_not_cached(tmp_path, monkeypatch):
+    html = (HTML_FIXTURES / "jsonld-graph.html").read_text(encoding="utf-8")
+    html = html.replace("</body>", "<p>Comment</p>" * 5000 + "</body>")
+    cache = HtmlCache(tmp_path)
+    scraper = RecipeScraper(html_cache=cache, early_stop=True)
+
+    stream(scraper, StreamingResponse(html.encode(), chunk_size=512))
+    assert cache.lookup("https://example.com/recipe") is None
+
+    stream(scraper, StreamingResponse(b"<html>short</html>", chunk_size=512))
+    assert cache.lookup("https://example.com/recipe").html == "<html>short</html>"
+
+
+class SlowRecipeHandler(BaseHTTPRequestHandler):
+    head = (HTML_FIXTURES / "jsonld-graph.html").read_bytes().split(b"<body")[0]
+    filler = b"<p>" + b"x" * 65529 + b"</p>"
+    chunks = 40
+
+    def do_GET(self):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(self.page_size()))
+        self.end_headers()
+        try:
+            self.wfile.write(self.head)
+            server.sent += len(self.head)
+            for _ in range(self.chunks):
+                self.wfile.flush()
+                time.sleep(0.05)
+                self.wfile.write(self.filler)
+                server.sent += len(self.filler)
+        except OSError:
+            pass
+        finally:
+            server.finished.set()
+
+    @classmethod
+    def page_size(cls) -> int:
+        return len(cls.head) + cls.chunks * len(cls.filler)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_early_stop_aborts_the_transfer_on_a_real_connection():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowRecipeHandler)
+    server.sent = 0
+    server.finished = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/recipe"
+
+    async def fetch() -> str:
+        scraper = RecipeScraper(early_stop=True)
+        try:
+            return await scraper.fetch_html(url)
+        finally:
+            await scraper.aclose()
+
+    try:
+        started = time.perf_counter()
+        html = asyncio.run(fetch())
+        elapsed = time.perf_counter() - started
+        assert server.finished.wait(timeout=10)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    page_size = SlowRecipeHandler.page_size()
+    assert html.startswith(SlowRecipeHandler.head.decode())
+    assert elapsed < 1.0
+    assert server.sent < page_size / 4
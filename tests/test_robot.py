@@ -0,0 +1,301 @@
+import asyncio
+import random
+import threading
+from pathlib import Path
+
+import pytest
+
+from chorba.lib import robot, throttle
+
+
+ROBOTS_TXT = """
+User-agent: *
+Disallow: /private/
+Sitemap: https://example.com/sitemap.xml
+"""
+
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200, text: str = ROBOTS_TXT, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, response: FakeResponse):
+        self.response = response
+        self.requested = []
+
+    async def get(self, url: str, **kwargs):
+        self.requested.append(url)
+        await asyncio.sleep(0)
+        return self.response
+
+
+def make_manager(monkeypatch, response: FakeResponse, **kwargs):
+    manager = robot.RobotsManager(**kwargs)
+    session = FakeSession(response)
+    monkeypatch.setattr(manager, "_get_session", lambda: session)
+    return manager, session
+
+
+def test_robots_manager_fetches_each_origin_once(monkeypatch):
+    manager, session = make_manager(monkeypatch, FakeResponse())
+
+    async def run():
+        return await asyncio.gather(
+            manager.can_fetch("https://example.com/recipes/a"),
+            manager.can_fetch("https://example.com/private/b"),
+            manager.get("https://example.com/"),
+        )
+
+    allowed, disallowed, robot_file = asyncio.run(run())
+
+    assert allowed is True
+    assert disallowed is False
+    assert robot_file.sitemap == "https://example.com/sitemap.xml"
+    assert session.requested == ["https://example.com/robots.txt"]
+
+
+@pytest.mark.parametrize("cache_control", ["no-store", "no-cache", "max-age=0"])
+def test_robots_manager_keeps_uncacheable_robots_for_min_ttl(
+    monkeypatch, tmp_path, cache_control
+):
+    manager, session = make_manager(
+        monkeypatch,
+        FakeResponse(headers={"cache-control": cache_control}),
+        cache_dir=tmp_path,
+        min_ttl=60,
+    )
+    now = [1000.0]
+    manager._cache._clock = lambda: now[0]
+    monkeypatch.setattr(robot.time, "time", lambda: now[0])
+
+    async def run():
+        await manager.can_fetch("https://example.com/a")
+        await manager.can_fetch("https://example.com/b")
+
+    asyncio.run(run())
+    assert len(session.requested) == 1
+    assert list(tmp_path.iterdir())
+
+    now[0] += 61
+    asyncio.run(run())
+    assert len(session.requested) == 2
+
+
+def test_robots_manager_maps_error_statuses(monkeypatch):
+    missing, _ = make_manager(monkeypatch, FakeResponse(status_code=404, text=""))
+    failing, _ = make_manager(monkeypatch, FakeResponse(status_code=503, text=""))
+
+    assert asyncio.run(missing.can_fetch("https://example.com/private/a")) is True
+    assert asyncio.run(failing.can_fetch("https://example.com/a")) is False
+
+
+def test_robots_manager_reuses_disk_cache_across_instances(monkeypatch, tmp_path):
+    first, first_session = make_manager(
+        monkeypatch, FakeResponse(), cache_dir=tmp_path
+    )
+    second, second_session = make_manager(
+        monkeypatch, FakeResponse(), cache_dir=tmp_path
+    )
+
+    assert asyncio.run(first.can_fetch("https://example.com/private/a")) is False
+    assert asyncio.run(second.can_fetch("https://example.com/private/a")) is False
+    assert first_session.requested == ["https://example.com/robots.txt"]
+    assert second_session.requested == []
+
+
+ROBOTS_FIXTURES = sorted((Path(__file__).parent / "fixtures" / "robots").glob("*.txt"))
+
+
+def candidate_urls(text: str, rng: random.Random) -> list[str]:
+    rule_paths = [
+        line.split(":", 1)[1].strip()
+        for line in text.splitlines()
+        if line.lower().startswith(("allow:", "disallow:"))
+    ]
+    fillers = ["", "x", "a/b", "123", "print", "?page=2", "&utm_source=x", ".json"]
+    alphabet = "/ab?*$.&=_-%2F0"
+
+    urls = []
+    for path in rule_paths:
+        stem = path.rstrip("$")
+        for filler in fillers:
+            expanded = stem.replace("*", rng.choice(fillers))
+            urls.append(f"https://www.example.test{expanded}{filler}")
+            urls.append(f"https://www.example.test{stem}{filler}")
+    for _ in range(500):
+        path = "/" + "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 14)))
+        urls.append(f"https://www.example.test{path}")
+    urls += [
+        "https://www.example.test",
+        "https://www.example.test/",
+        "https://www.example.test//food//recipes/",
+        "https://www.example.test/search?q=http://x.test//y",
+        "https://www.example.test/%E2%80%9C/quote",
+        "HTTPS://www.example.test/account/",
+        "https://other.test/account/",
+        "https://www.example.test:443/cart",
+        "/account/relative",
+    ]
+    return urls
+
+
+@pytest.mark.parametrize("fixture", ROBOTS_FIXTURES, ids=lambda path: path.stem)
+def test_robot_rules_match_robotspy(fixture):
+    text = fixture.read_text(encoding="utf-8")
+    rp = robot._parse_robots("https://www.example.test/robots.txt", 200, text)
+    rules = robot.RobotRules(rp)
+    urls = candidate_urls(text, random.Random(fixture.stem))
+
+    expected = [url for url in urls if rp.can_fetch("*", url)]
+
+    assert [url for url in urls if rules.can_fetch(url)] == expected
+    assert rules.filter_urls(urls) == expected
+    assert 0 < len(expected) < len(urls)
+
+
+@pytest.mark.parametrize(
+    ("status", "allowed"), [(404, True), (403, False), (None, False)]
+)
+def test_robot_rules_follow_blanket_statuses(status, allowed):
+    rp = robot._parse_robots("https://example.com/robots.txt", status, ROBOTS_TXT)
+    urls = ["https://example.com/private/a", "https://example.com/a"]
+
+    assert robot.RobotRules(rp).filter_urls(urls) == (urls if allowed else [])
+
+
+def test_robot_file_manager_filter_urls_uses_compiled_rules():
+    rp = robot._parse_robots("https://example.com/robots.txt", 200, ROBOTS_TXT)
+    manager = robot.RobotFileManager("https://example.com/", rp=rp)
+
+    assert manager.filter_urls(
+        ["https://example.com/private/a", "https://example.com/public/b"]
+    ) == ["https://example.com/public/b"]
+    assert manager.rules is manager.rules
+
+
+class FailingSession(FakeSession):
+    async def get(self, url: str, **kwargs):
+        self.requested.append(url)
+        raise ConnectionError("connection reset")
+
+
+def test_robots_manager_retries_unreachable_hosts_after_error_ttl(monkeypatch):
+    manager = robot.RobotsManager(error_ttl=60)
+    failing = FailingSession(FakeResponse())
+    monkeypatch.setattr(manager, "_get_session", lambda: failing)
+    now = [1000.0]
+    manager._cache._clock = lambda: now[0]
+
+    async def run():
+        return await asyncio.gather(
+            manager.can_fetch("https://example.com/a"),
+            manager.can_fetch("https://example.com/b"),
+        )
+
+    assert asyncio.run(run()) == [False, False]
+    assert failing.requested == ["https://example.com/robots.txt"]
+    assert manager._pending == {}
+
+    recovered = FakeSession(FakeResponse())
+    monkeypatch.setattr(manager, "_get_session", lambda: recovered)
+    assert asyncio.run(manager.can_fetch("https://example.com/a")) is False
+    now[0] += 61
+    assert asyncio.run(manager.can_fetch("https://example.com/a")) is True
+    assert recovered.requested == ["https://example.com/robots.txt"]
+
+
+def test_robots_manager_caches_server_errors_briefly(monkeypatch, tmp_path):
+    manager, _ = make_manager(
+        monkeypatch,
+        FakeResponse(
+            status_code=503, text="", headers={"cache-control": "max-age=86400"}
+        ),
+        cache_dir=tmp_path,
+        error_ttl=60,
+    )
+
+    assert asyncio.run(manager._fetch("https://example.com/robots.txt"))[1] == 60
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_robots_manager_reads_crawl_delay_for_the_scheduler(monkeypatch):
+    robots_txt = """
+User-agent: Googlebot
+Crawl-delay: 1
+
+User-agent: otherbot
+User-agent: *
+Crawl-delay: 10
+Disallow: /private/
+"""
+    manager, _ = make_manager(monkeypatch, FakeResponse(text=robots_txt))
+
+    robot_file = asyncio.run(manager.get("https://example.com/"))
+
+    assert robot_file.crawl_delay == 10
+    assert throttle.rate_for_crawl_delay(robot_file.crawl_delay, 5.0) == 0.1
+    assert robot_file.rp.crawl_delay("Googlebot") == 1
+    assert not robot_file.can_fetch("https://example.com/private/a")
+
+
+def test_robots_manager_reads_and_writes_disk_cache_off_the_event_loop(
+    monkeypatch, tmp_path
+):
+    manager, _ = make_manager(monkeypatch, FakeResponse(), cache_dir=tmp_path)
+    threads = []
+    load_from_disk = manager._load_from_disk
+    store_on_disk = manager._store_on_disk
+
+    def record_load(*args):
+        threads.append(threading.current_thread())
+        return load_from_disk(*args)
+
+    def record_store(*args):
+        threads.append(threading.current_thread())
+        return store_on_disk(*args)
+
+    monkeypatch.setattr(manager, "_load_from_disk", record_load)
+    monkeypatch.setattr(manager, "_store_on_disk", record_store)
+
+    asyncio.run(manager.can_fetch("https://example.com/a"))
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_robots_manager_filter_urls_compiles_rules_once_per_origin(monkeypatch):
+    manager, session = make_manager(monkeypatch, FakeResponse())
+    compiled = []
+
+    class CountingRules(robot.RobotRules):
+        def __init__(self, rp, user_agent="*"):
+            compiled.append(rp.url)
+            super().__init__(rp, user_agent)
+
+    monkeypatch.setattr(robot, "RobotRules", CountingRules)
+    urls = [
+        "https://example.com/a",
+        "https://other.test/private/b",
+        "https://example.com/private/c",
+        "https://other.test/d",
+    ]
+
+    async def run():
+        first = await manager.filter_urls(urls)
+        second = await manager.filter_urls(urls)
+        robot_file = await manager.get("https://example.com/")
+        return first, second, robot_file.filter_urls(urls[:1])
+
+    first, second, from_manager = asyncio.run(run())
+
+    assert first == second == ["https://example.com/a", "https://other.test/d"]
+    assert from_manager == ["https://example.com/a"]
+    assert sorted(compiled) == [
+        "https://example.com/robots.txt",
+        "https://other.test/robots.txt",
+    ]
+    assert len(session.requested) == 2
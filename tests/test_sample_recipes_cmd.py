@@ -1,3 +1,4 @@
+import json
 import random
 
 from chorba.cmd import sample_recipes
@@ -21,14 +22,52 @@ def test_sitemap_candidates_include_direct_host_variants():
     ]
 
 
-def test_sample_urls_is_reproducible():
-    urls = [f"https://example.com/{index}" for index in range(10)]
+def reservoir_sample(urls: list[str], size: int, key: str) -> list[str]:
+    reservoir = sample_recipes.UrlReservoir(size, key=key)
+    for url in urls:
+        reservoir.add(url)
+    return reservoir.sample()
+
+
+def test_url_reservoir_is_reproducible_and_order_independent():
+    urls = [f"https://example.com/{index}" for index in range(100)]
+    shuffled = list(urls)
+    random.Random(7).shuffle(shuffled)
 
-    first = sample_recipes.sample_urls(urls, 3, random.Random(42))
-    second = sample_recipes.sample_urls(urls, 3, random.Random(42))
+    first = reservoir_sample(urls, 3, "42:example.com")
+    second = reservoir_sample(shuffled, 3, "42:example.com")
 
     assert first == second
     assert len(first) == 3
+    assert reservoir_sample(urls, 3, "43:example.com") != first
+
+
+def test_url_reservoir_ignores_duplicates():
+    urls = [f"https://example.com/{index}" for index in range(5)]
+    reservoir = sample_recipes.UrlReservoir(10, key="42:example.com")
+    for url in urls + urls:
+        reservoir.add(url)
+
+    assert sorted(reservoir.sample()) == urls
+    assert reservoir.seen == 10
+    assert reservoir.distinct == 5
+    assert reservoir_sample(urls * 3, 2, "k") == reservoir_sample(urls, 2, "k")
+
+
+def test_url_reservoir_without_limit_keeps_everything():
+    urls = [f"https://example.com/{index}" for index in range(20)]
+
+    assert sorted(reservoir_sample(urls, 0, "k")) == sorted(urls)
+
+
+def test_url_reservoir_samples_uniformly():
+    urls = [f"https://example.com/{index}" for index in range(10)]
+    counts = {url: 0 for url in urls}
+    for trial in range(2000):
+        for url in reservoir_sample(urls, 2, f"{trial}:example.com"):
+            counts[url] += 1
+
+    assert all(300 < count < 500 for count in counts.values())
 
 
 def test_serialize_recipe_uses_api_shape():
@@ -111,6 +150,10 @@ def test_resolve_sitemap_url_uses_direct_fallback(monkeypatch):
             self.sitemap = None
             self.crawl_delay = 3
 
+    class FakeRobotsManager:
+        async def get(self, url: str):
+            return FakeRobotFileManager(url)
+
     class FakeResponse:
         def raise_for_status(self):
             return None
@@ -122,10 +165,11 @@ def test_resolve_sitemap_url_uses_direct_fallback(monkeypatch):
                 return FakeResponse()
             raise RuntimeError("not found")
 
-    monkeypatch.setattr(sample_recipes, "RobotFileManager", FakeRobotFileManager)
     monkeypatch.setattr(sample_recipes, "requests", FakeRequests)
 
-    sitemap, crawl_delay = sample_recipes.resolve_sitemap_url("food52.com")
+    sitemap, crawl_delay = sample_recipes.asyncio.run(
+        sample_recipes.resolve_sitemap_url("food52.com", FakeRobotsManager())
+    )
 
     assert sitemap == "https://food52.com/sitemap.xml"
     assert crawl_delay == 3
@@ -140,30 +184,168 @@ def test_discover_recipe_urls_filters_and_dedupes(monkeypatch):
         def filter_urls(self, urls: list[str]) -> list[str]:
             return [url for url in urls if "keep" in url]
 
+    class FakeRobotsManager:
+        async def get(self, url: str):
+            return FakeRobotFileManager(url)
+
     class FakeParser:
-        async def get_recipe_urls(self) -> list[str]:
-            return [
-                "https://example.com/keep-a",
-                "https://example.com/drop-b",
-                "https://example.com/keep-a",
-                "https://example.com/keep-c",
-            ]
+        async def iter_recipe_url_batches(self):
+            yield ["https://example.com/keep-a", "https://example.com/drop-b"]
+            yield ["https://example.com/keep-a", "https://example.com/keep-c"]
 
     class FakeFactory:
         @staticmethod
-        def from_xml_url(url: str):
+        def from_xml_url(url: str, robots=None, **kwargs):
             return FakeParser()
 
-    monkeypatch.setattr(sample_recipes, "RobotFileManager", FakeRobotFileManager)
     monkeypatch.setattr(sample_recipes, "SitemapParserFactory", FakeFactory)
 
-    sitemap, crawl_delay, urls = sample_recipes.asyncio.run(
-        sample_recipes.discover_recipe_urls("example.com")
+    sitemap, crawl_delay, reservoir = sample_recipes.asyncio.run(
+        sample_recipes.discover_recipe_urls(
+            "example.com", FakeRobotsManager(), per_site=10, seed=42
+        )
     )
 
     assert sitemap == "https://example.com/sitemap.xml"
     assert crawl_delay == 2
-    assert urls == [
+    assert reservoir.seen == 3
+    assert reservoir.distinct == 2
+    assert sorted(reservoir.sample()) == [
         "https://example.com/keep-a",
         "https://example.com/keep-c",
     ]
+
+
+def test_record_writer_streams_records_and_counts(tmp_path):
+    output = tmp_path / "out.jsonl"
+    records = [
+        {"url": "a", "scrape_ok": True, "recipe_found": True},
+        {"url": "b", "scrape_ok": True, "recipe_found": False},
+        {"url": "c", "scrape_ok": False, "recipe_found": False},
+    ]
+
+    async def run():
+        async with sample_recipes.RecordWriter(output, flush_every=2) as writer:
+            await writer.put(records[0])
+            await writer.put(records[1])
+            while writer.counters.records < 2:
+                await sample_recipes.asyncio.sleep(0)
+            flushed = output.read_text(encoding="utf-8").splitlines()
+            await writer.put(records[2])
+        return writer.counters, flushed
+
+    counters, flushed = sample_recipes.asyncio.run(run())
+
+    assert [json.loads(line)["url"] for line in flushed] == ["a", "b"]
+    assert [
+        json.loads(line)["url"]
+        for line in output.read_text(encoding="utf-8").splitlines()
+    ] == ["a", "b", "c"]
+    assert counters == sample_recipes.SamplingCounters(
+        records=3, recipes_found=1, scrape_failures=1
+    )
+
+
+def test_record_writer_flushes_idle_records_after_the_interval(tmp_path):
+    output = tmp_path / "out.jsonl"
+
+    async def run():
+        async with sample_recipes.RecordWriter(
+            output, flush_every=100, flush_interval=0.05
+        ) as writer:
+            await writer.put({"url": "a", "scrape_ok": True, "recipe_found": True})
+            await sample_recipes.asyncio.sleep(0.3)
+            return output.read_text(encoding="utf-8").splitlines()
+
+    flushed = sample_recipes.asyncio.run(run())
+
+    assert [json.loads(line)["url"] for line in flushed] == ["a"]
+
+
+def test_record_writer_serializes_queued_recipes_in_one_batch(tmp_path, monkeypatch):
+    output = tmp_path / "out.jsonl"
+    batches = []
+    monkeypatch.setattr(
+        sample_recipes,
+        "prepare_recipes",
+        lambda recipes: batches.append([recipe.title for recipe in recipes]),
+    )
+
+    def record(url: str, recipe: Recipe | None) -> dict:
+        return sample_recipes.build_record(
+            host="example.com",
+            sitemap="https://example.com/sitemap.xml",
+            crawl_delay=0,
+            seed=42,
+            sample_index=0,
+            url=url,
+            recipe=recipe,
+            error=None,
+            serialize=False,
+        )
+
+    async def run():
+        async with sample_recipes.RecordWriter(output) as writer:
+            await writer.put(record("a", Recipe({"name": "A"})))
+            await writer.put(record("b", None))
+            await writer.put(record("c", Recipe({"name": "C"})))
+
+    sample_recipes.asyncio.run(run())
+
+    lines = [
+        json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()
+    ]
+    assert batches == [["A", "C"]]
+    assert [line["recipe"] and line["recipe"]["title"] for line in lines] == [
+        "A",
+        None,
+        "C",
+    ]
+
+
+def test_load_completed_urls_drops_partial_trailing_line(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        json.dumps({"host": "example.com", "url": "https://example.com/a"})
+        + "\n"
+        + '{"host": "example.com", "url": "https://exa',
+        encoding="utf-8",
+    )
+
+    completed = sample_recipes.load_completed_urls(output)
+
+    assert completed == {("example.com", "https://example.com/a")}
+    assert output.read_text(encoding="utf-8").endswith("}\n")
+
+
+def test_checkpoint_resume_reuses_matching_plans(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        json.dumps({"host": "example.com", "url": "https://example.com/a"}) + "\n",
+        encoding="utf-8",
+    )
+    checkpoint = sample_recipes.SamplingCheckpoint.fresh(output)
+    checkpoint.record_plan(
+        sample_recipes.HostPlan(
+            host="example.com",
+            seed=42,
+            per_site=2,
+            sitemap="https://example.com/sitemap.xml",
+            crawl_delay=1,
+            discovered_urls=10,
+            sampled=["https://example.com/a", "https://example.com/b"],
+        )
+    )
+
+    resumed = sample_recipes.SamplingCheckpoint.resume(output)
+
+    plan = resumed.plan_for("example.com", seed=42, per_site=2)
+    assert plan.sampled == ["https://example.com/a", "https://example.com/b"]
+    assert resumed.plan_for("example.com", seed=7, per_site=2) is None
+    assert resumed.is_done("example.com", "https://example.com/a")
+    assert not resumed.is_done("example.com", "https://example.com/b")
+
+    replayed = sample_recipes.SamplingCheckpoint.replay(output)
+
+    assert replayed.plan_for("example.com", seed=42, per_site=2) == plan
+    assert not replayed.is_done("example.com", "https://example.com/a")
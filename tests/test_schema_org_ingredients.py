@@ -1,11 +1,22 @@
+from types import SimpleNamespace
 from unittest.mock import patch
 
+import pytest
 from fastapi.testclient import TestClient
 
 from chorba.cmd.server import create_app
+from chorba.lib.cache import LRUCache
 from chorba.lib.markup import _schema_org
 
 
+@pytest.fixture(autouse=True)
+def ingredient_cache(monkeypatch):
+    """Give every test its own parsed-ingredient cache."""
+    cache = LRUCache()
+    monkeypatch.setattr(_schema_org, "_ingredient_cache", cache)
+    return cache
+
+
 def test_parses_basic_ingredient_fields():
     recipe = _schema_org.Recipe(
         {
@@ -771,3 +782,221 @@ def test_app_startup_warms_ingredient_parser():
             pass
 
     ready.assert_called_once_with()
+
+
+def test_serialization_parses_each_ingredient_once():
+    recipe = _schema_org.Recipe(
+        {
+            "name": "Test",
+            "recipeIngredient": ["2 cloves garlic, minced", "1 onion, sliced"],
+            "recipeInstructions": ["Cook the garlic.", "Add the onion."],
+        }
+    )
+
+    with patch.object(
+        _schema_org,
+        "_parse_ingredient_sentence",
+        side_effect=RuntimeError("boom"),
+    ) as parse_ingredient:
+        _schema_org.TypeAdapter(_schema_org.Recipe).dump_python(recipe, mode="json")
+
+    assert parse_ingredient.call_count == 2
+
+
+def test_invalidate_recomputes_memoized_ingredients():
+    recipe = _schema_org.Recipe({"name": "Test", "recipeIngredient": ["salt"]})
+
+    with patch.object(
+        _schema_org,
+        "_parse_ingredient_sentence",
+        side_effect=RuntimeError("boom"),
+    ) as parse_ingredient:
+        assert recipe.ingredients is recipe.ingredients
+        recipe._data["recipeIngredient"].append("pepper")
+        recipe.invalidate()
+        assert [item.sentence for item in recipe.ingredients] == ["salt", "pepper"]
+
+    assert parse_ingredient.call_count == 3
+
+
+def _fake_parsed_ingredient(sentence: str, name: str):
+    return SimpleNamespace(
+        sentence=sentence,
+        name=[SimpleNamespace(text=name)],
+        amount=[],
+        size=None,
+        preparation=None,
+        comment=None,
+        purpose=None,
+    )
+
+
+def test_ingredient_cache_reuses_parsed_sentences_across_recipes():
+    with patch.object(
+        _schema_org,
+        "_parse_ingredient_sentence",
+        side_effect=lambda sentence: _fake_parsed_ingredient(sentence, "salt"),
+    ) as parse_ingredient:
+        first = _schema_org.Recipe(
+            {"name": "First", "recipeIngredient": ["1 tsp salt"]}
+        ).ingredients
+        second = _schema_org.Recipe(
+            {"name": "Second", "recipeIngredient": ["pepper", "1  tsp salt"]}
+        ).ingredients
+        stats = _schema_org.ingredient_cache_stats()
+
+    assert parse_ingredient.call_count == 2
+    assert first[0].names == ["salt"]
+    assert second[1].id == "ingredient_1"
+    assert second[1].names == ["salt"]
+    assert second[1].names is not first[0].names
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+
+
+def test_ingredient_cache_does_not_store_parser_failures():
+    with patch.object(
+        _schema_org,
+        "_parse_ingredient_sentence",
+        side_effect=RuntimeError("boom"),
+    ) as parse_ingredient:
+        for _ in range(2):
+            _schema_org.Recipe(
+                {"name": "Test", "recipeIngredient": ["mystery ingredient"]}
+            ).ingredients
+
+    assert parse_ingredient.call_count == 2
+
+
+def test_normalize_ingredients_parses_repeated_sentences_once():
+    with patch.object(
+        _schema_org,
+        "_parse_ingredient_sentence",
+        side_effect=lambda sentence: _fake_parsed_ingredient(sentence, "salt"),
+    ) as parse_ingredient:
+        ingredients = _schema_org.normalize_ingredients(
+            ["1 tsp salt", "pepper", "1 tsp salt"]
+        )
+
+    assert parse_ingredient.call_count == 2
+    assert [ingredient.id for ingredient in ingredients] == [
+        "ingredient_0",
+        "ingredient_1",
+        "ingredient_2",
+    ]
+
+
+def test_prepare_recipes_batches_and_memoizes_ingredients():
+    recipes = [
+        _schema_org.Recipe({"name": "First", "recipeIngredient": ["salt", "oil"]}),
+        _schema_org.Recipe({"name": "Second", "recipeIngredient": ["oil", "rice"]}),
+    ]
+
+    with patch.object(
+        _schema_org,
+        "_parse_ingredient_sentence",
+        side_effect=lambda sentence: _fake_parsed_ingredient(sentence, sentence),
+    ) as parse_ingredient:
+        _schema_org.prepare_recipes(recipes)
+        second_ingredients = recipes[1].ingredients
+
+    assert parse_ingredient.call_count == 3
+    assert [ingredient.names for ingredient in second_ingredients] == [
+        ["oil"],
+        ["rice"],
+    ]
+    assert second_ingredients[0].id == "ingredient_0"
+
+
+def test_prepare_recipes_drops_directions_memoized_against_old_ingredients():
+    recipe = _schema_org.Recipe(
+        {"recipeIngredient": ["salt"], "recipeInstructions": ["Add the salt."]}
+    )
+
+    with patch.object(
+        _schema_org,
+        "_parse_ingredient_sentence",
+        side_effect=lambda sentence: _fake_parsed_ingredient(sentence, sentence),
+    ):
+        assert recipe.directions[0].highlights[0].ids == ["ingredient_0"]
+        recipe._data["recipeIngredient"] = ["pepper", "salt"]
+        _schema_org.prepare_recipes([recipe])
+        directions = recipe.directions
+
+    assert directions[0].highlights[0].ids == ["ingredient_1"]
+
+
+def test_candidate_matcher_finds_overlapping_whole_word_spans_in_one_pass():
+    matcher = _schema_org._CandidateMatcher(
+        [
+            ("ingredient_0", "red pepper flakes", False),
+            ("ingredient_1", "red pepper", False),
+            ("ingredient_1", "pepper", True),
+        ]
+    )
+
+    assert matcher.find_all("Add Red Pepper flakes, then peppers and pepper.") == [
+        [(4, 21)],
+        [(4, 14)],
+        [(8, 14), (40, 46)],
+    ]
+
+
+def test_directions_prefer_longest_match_with_fake_parser():
+    def fake_parse(sentence: str):
+        name = sentence.split(" ", 1)[1]
+        return _fake_parsed_ingredient(sentence, name)
+
+    recipe = _schema_org.Recipe(
+        {
+            "name": "Test",
+            "recipeIngredient": ["1 red pepper", "1 crushed red pepper flakes"],
+            "recipeInstructions": [
+                "Add the crushed red pepper flakes, then the red pepper."
+            ],
+        }
+    )
+
+    with patch.object(
+        _schema_org, "_parse_ingredient_sentence", side_effect=fake_parse
+    ):
+        highlights = recipe.directions[0].highlights
+
+    assert [(item.text, item.ids) for item in highlights] == [
+        ("crushed red pepper flakes", ["ingredient_1"]),
+        ("red pepper", ["ingredient_0"]),
+    ]
+
+
+def test_highlight_index_is_built_once_per_recipe():
+    recipe = _schema_org.Recipe(
+        {
+            "name": "Test",
+            "recipeIngredient": ["1 red onion", "1 white onion"],
+            "recipeInstructions": [f"Step {index}: slice the onion." for index in range(25)],
+        }
+    )
+
+    with (
+        patch.object(
+            _schema_org,
+            "_parse_ingredient_sentence",
+            side_effect=lambda sentence: _fake_parsed_ingredient(
+                sentence, sentence.split(" ", 1)[1]
+            ),
+        ),
+        patch.object(
+            _schema_org,
+            "_groupable_suffixes",
+            wraps=_schema_org._groupable_suffixes,
+        ) as groupable_suffixes,
+        patch.object(
+            _schema_org,
+            "_ingredient_match_candidates",
+            wraps=_schema_org._ingredient_match_candidates,
+        ) as match_candidates,
+    ):
+        directions = recipe.directions
+
+    assert len(directions) == 25
+    assert groupable_suffixes.call_count == 1
+    assert match_candidates.call_count == 1
@@ -0,0 +1,494 @@
+import asyncio
+import gzip
+import time
+from urllib.parse import urlparse
+
+import pytest
+
+from chorba.lib.sitemap import (
+    BaseSitemapParser,
+    BBCSitemapParser,
+    GenericSitemapParser,
+    NYTCookingSitemapParser,
+    SitemapParserFactory,
+    SitemapCache,
+    SitemapDocument,
+    SitemapFetchStats,
+    SitemapStreamParser,
+    url_path,
+)
+
+
+URLSET = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://www.bbc.co.uk/food/recipes/pasta_123</loc><lastmod>2024-01-02</lastmod></url>
+  <url><loc>https://www.bbc.co.uk/food/ingredients/tomato</loc></url>
+  <url><loc></loc></url>
+</urlset>
+"""
+
+SITEMAP_INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>/sitemaps/recipes-1.xml</loc><lastmod>2024-03-01</lastmod></sitemap>
+  <sitemap><loc>https://example.com/sitemaps/recipes-2.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+
+def test_stream_parser_yields_entries_with_lastmod():
+    parser = SitemapStreamParser()
+
+    entries = parser.feed(URLSET) + parser.close()
+
+    assert entries == [
+        ("url", "https://www.bbc.co.uk/food/recipes/pasta_123", "2024-01-02"),
+        ("url", "https://www.bbc.co.uk/food/ingredients/tomato", None),
+    ]
+
+
+def test_stream_parser_handles_arbitrary_chunk_boundaries():
+    document = "\n  " + SITEMAP_INDEX
+    parser = SitemapStreamParser()
+
+    entries = []
+    for offset in range(0, len(document), 7):
+        entries.extend(parser.feed(document[offset : offset + 7]))
+    entries.extend(parser.close())
+
+    assert entries == [
+        ("sitemap", "/sitemaps/recipes-1.xml", "2024-03-01"),
+        ("sitemap", "https://example.com/sitemaps/recipes-2.xml", None),
+    ]
+
+
+def test_stream_parser_accepts_bytes_without_namespace():
+    parser = SitemapStreamParser()
+
+    entries = parser.feed(b"<urlset><url><loc>https://a.test/x</loc></url></urlset>")
+    entries += parser.close()
+
+    assert entries == [("url", "https://a.test/x", None)]
+
+
+def test_stream_parser_ignores_empty_and_malformed_documents():
+    empty = SitemapStreamParser()
+    assert empty.feed("   ") == []
+    assert empty.close() == []
+
+    broken = SitemapStreamParser()
+    entries = broken.feed("<urlset><url><loc>https://a.test/x</loc></url><url><loc>")
+    entries += broken.close()
+    assert entries[0] == ("url", "https://a.test/x", None)
+
+
+def test_parse_sitemap_urls_filters_recipe_paths():
+    parser = BBCSitemapParser("https://www.bbc.co.uk/sitemap.xml")
+
+    urls, subsitemap_urls = parser._parse_sitemap_urls(
+        URLSET, "https://www.bbc.co.uk/sitemap.xml", chunk_size=16
+    )
+
+    assert urls == ["https://www.bbc.co.uk/food/recipes/pasta_123"]
+    assert subsitemap_urls == []
+
+
+def test_parse_sitemap_urls_resolves_subsitemaps_against_base_url():
+    parser = GenericSitemapParser("https://example.com/sitemap.xml")
+
+    urls, subsitemap_urls = parser._parse_sitemap_urls(
+        SITEMAP_INDEX, "https://example.com/sitemap.xml"
+    )
+
+    assert urls == []
+    assert subsitemap_urls == [
+        "https://example.com/sitemaps/recipes-1.xml",
+        "https://example.com/sitemaps/recipes-2.xml",
+    ]
+
+
+INDEX_WITH_CHILDREN = """<sitemapindex>
+  <sitemap><loc>https://example.com/a.xml</loc></sitemap>
+  <sitemap><loc>https://example.com/b.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+
+def _urlset(*urls: str) -> str:
+    return "<urlset>" + "".join(f"<url><loc>{url}</loc></url>" for url in urls) + "</urlset>"
+
+
+def _document(url: str, xml: str | None) -> SitemapDocument | None:
+    if xml is None:
+        return None
+    return SitemapDocument(url=url, entries=BaseSitemapParser._parse_entries(xml))
+
+
+def patch_fetch(monkeypatch, documents: dict[str, str], delays: dict[str, float]):
+    fetched = []
+
+    async def fake_fetch_sitemap(self, url, session, cached=None):
+        fetched.append(url)
+        await asyncio.sleep(delays.get(url, 0))
+        return _document(url, documents.get(url))
+
+    monkeypatch.setattr(BaseSitemapParser, "_fetch_sitemap", fake_fetch_sitemap)
+    return fetched
+
+
+SITEMAP_TREE = {
+    "https://example.com/sitemap.xml": INDEX_WITH_CHILDREN,
+    "https://example.com/a.xml": _urlset("https://example.com/a1", "https://example.com/a2"),
+    "https://example.com/b.xml": _urlset("https://example.com/b1"),
+}
+
+
+def test_iter_recipe_urls_yields_as_sub_sitemaps_complete(monkeypatch):
+    patch_fetch(monkeypatch, SITEMAP_TREE, {"https://example.com/a.xml": 0.05})
+    parser = GenericSitemapParser("https://example.com/sitemap.xml")
+
+    async def run():
+        return [url async for url in parser.iter_recipe_urls()]
+
+    assert asyncio.run(run()) == [
+        "https://example.com/b1",
+        "https://example.com/a1",
+        "https://example.com/a2",
+    ]
+
+
+def test_get_recipe_urls_keeps_document_order(monkeypatch):
+    patch_fetch(monkeypatch, SITEMAP_TREE, {"https://example.com/a.xml": 0.05})
+    parser = GenericSitemapParser("https://example.com/sitemap.xml")
+
+    assert asyncio.run(parser.get_recipe_urls()) == [
+        "https://example.com/a1",
+        "https://example.com/a2",
+        "https://example.com/b1",
+    ]
+
+
+def test_iter_recipe_urls_stops_walking_when_consumer_exits(monkeypatch):
+    fetched = patch_fetch(monkeypatch, SITEMAP_TREE, {"https://example.com/a.xml": 10})
+    parser = GenericSitemapParser("https://example.com/sitemap.xml")
+
+    async def run():
+        urls = parser.iter_recipe_urls()
+        first = await anext(urls)
+        await urls.aclose()
+        return first
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=1)) == "https://example.com/b1"
+    assert "https://example.com/a.xml" in fetched
+
+
+def test_iter_recipe_urls_propagates_fetch_errors(monkeypatch):
+    async def failing_fetch_sitemap(self, url, session, cached=None):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(BaseSitemapParser, "_fetch_sitemap", failing_fetch_sitemap)
+    parser = GenericSitemapParser("https://example.com/sitemap.xml")
+
+    async def run():
+        return [url async for url in parser.iter_recipe_urls()]
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(run())
+
+
+def test_sub_sitemaps_are_fetched_newest_first_within_host_limit(monkeypatch):
+    index = """<sitemapindex>
+      <sitemap><loc>https://example.com/old.xml</loc><lastmod>2020-01-01</lastmod></sitemap>
+      <sitemap><loc>https://example.com/undated.xml</loc></sitemap>
+      <sitemap><loc>https://example.com/new.xml</loc><lastmod>2024-05-01T10:00:00+00:00</lastmod></sitemap>
+      <sitemap><loc>https://example.com/mid.xml</loc><lastmod>2022-06-01</lastmod></sitemap>
+    </sitemapindex>"""
+    documents = {"https://example.com/sitemap.xml": index}
+    for name in ["old", "undated", "new", "mid"]:
+        documents[f"https://example.com/{name}.xml"] = _urlset(f"https://example.com/{name}")
+
+    in_flight = 0
+    peak = 0
+    fetched = []
+
+    async def fake_fetch_sitemap(self, url, session, cached=None):
+        nonlocal in_flight, peak
+        fetched.append(url)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _document(url, documents.get(url))
+
+    monkeypatch.setattr(BaseSitemapParser, "_fetch_sitemap", fake_fetch_sitemap)
+    parser = GenericSitemapParser("https://example.com/sitemap.xml", fetch_concurrency=1)
+
+    urls = asyncio.run(parser.get_recipe_urls())
+
+    assert peak == 1
+    assert fetched[1:] == [
+        "https://example.com/new.xml",
+        "https://example.com/mid.xml",
+        "https://example.com/old.xml",
+        "https://example.com/undated.xml",
+    ]
+    assert urls == [
+        "https://example.com/old",
+        "https://example.com/undated",
+        "https://example.com/new",
+        "https://example.com/mid",
+    ]
+    assert parser.fetch_stats.fetches == 5
+    assert parser.fetch_stats.failures == 0
+
+
+def test_sub_sitemaps_keep_newest_first_order_with_a_cache(monkeypatch, tmp_path):
+    index = """<sitemapindex>
+      <sitemap><loc>https://example.com/old.xml</loc><lastmod>2020-01-01</lastmod></sitemap>
+      <sitemap><loc>https://example.com/new.xml</loc><lastmod>2024-05-01</lastmod></sitemap>
+      <sitemap><loc>https://example.com/mid.xml</loc><lastmod>2022-06-01</lastmod></sitemap>
+    </sitemapindex>"""
+    documents = {"https://example.com/sitemap.xml": index}
+    for name in ["old", "new", "mid"]:
+        documents[f"https://example.com/{name}.xml"] = _urlset(f"https://example.com/{name}")
+    fetched = patch_fetch(monkeypatch, documents, {})
+
+    # Slower cache reads for newer sitemaps would reverse the order if loads
+    # raced each other ahead of the host slot.
+    load_delays = {"new": 0.06, "mid": 0.03, "old": 0}
+    cache = SitemapCache(tmp_path)
+    load = cache.load
+
+    def slow_load(url):
+        for name, delay in load_delays.items():
+            if url.endswith(f"/{name}.xml"):
+                time.sleep(delay)
+        return load(url)
+
+    monkeypatch.setattr(cache, "load", slow_load)
+    parser = GenericSitemapParser(
+        "https://example.com/sitemap.xml", fetch_concurrency=1, cache=cache
+    )
+
+    asyncio.run(parser.get_recipe_urls())
+
+    assert fetched[1:] == [
+        "https://example.com/new.xml",
+        "https://example.com/mid.xml",
+        "https://example.com/old.xml",
+    ]
+
+
+def test_fetch_stats_describe_reports_percentiles():
+    stats = SitemapFetchStats()
+    for seconds in [0.1, 0.2, 0.3, 0.4]:
+        stats.record(seconds, ok=True)
+    stats.record(2.0, ok=False)
+
+    assert stats.percentile(0.5) == 0.3
+    assert stats.describe() == (
+        "fetches=5 failures=1 not_modified=0 cache_hits=0 "
+        "p50=0.30s p95=2.00s max=2.00s"
+    )
+
+
+class FakeResponse:
+    def __init__(
+        self,
+        status_code: int,
+        body: str | bytes = b"",
+        headers: dict | None = None,
+        chunk_size: int = 5,
+    ):
+        self.status_code = status_code
+        self.body = body.encode() if isinstance(body, str) else body
+        self.headers = headers or {}
+        self.chunk_size = chunk_size
+        self.closed = False
+
+    def raise_for_status(self) -> None:
+        assert self.status_code < 400
+
+    async def aiter_content(self):
+        for offset in range(0, len(self.body), self.chunk_size):
+            yield self.body[offset : offset + self.chunk_size]
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, responses: dict[str, FakeResponse]):
+        self.responses = responses
+        self.requests = []
+
+    async def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, headers))
+        return self.responses[url]
+
+
+def test_sitemap_cache_round_trips_documents(tmp_path):
+    cache = SitemapCache(tmp_path)
+    document = SitemapDocument(
+        url="https://example.com/a.xml",
+        entries=[("url", "https://example.com/a1", "2024-01-01")],
+        etag='"abc"',
+        lastmod="2024-02-01",
+    )
+
+    cache.store(document)
+
+    assert cache.load("https://example.com/a.xml") == document
+    assert cache.load("https://example.com/missing.xml") is None
+
+
+def test_fetch_sitemap_sends_validators_and_reuses_cache_on_304():
+    cached = SitemapDocument(
+        url="https://example.com/a.xml",
+        entries=[("url", "https://example.com/a1", None)],
+        etag='"abc"',
+        last_modified="Mon, 01 Jan 2024 00:00:00 GMT",
+    )
+    session = FakeSession({"https://example.com/a.xml": FakeResponse(304)})
+    parser = GenericSitemapParser("https://example.com/a.xml")
+
+    document = asyncio.run(
+        parser._fetch_sitemap("https://example.com/a.xml", session, cached)
+    )
+
+    assert document is cached
+    _, headers = session.requests[0]
+    assert headers["If-None-Match"] == '"abc"'
+    assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_fetch_sitemap_records_validators_from_response():
+    session = FakeSession(
+        {
+            "https://example.com/a.xml": FakeResponse(
+                200,
+                _urlset("https://example.com/a1"),
+                headers={"etag": '"v2"', "last-modified": "Tue, 02 Jan 2024"},
+            )
+        }
+    )
+    parser = GenericSitemapParser("https://example.com/a.xml")
+
+    document = asyncio.run(parser._fetch_sitemap("https://example.com/a.xml", session))
+
+    assert document.entries == [("url", "https://example.com/a1", None)]
+    assert document.etag == '"v2"'
+    assert document.last_modified == "Tue, 02 Jan 2024"
+
+
+def test_walk_skips_sub_sitemaps_with_unchanged_lastmod(monkeypatch, tmp_path):
+    index = """<sitemapindex>
+      <sitemap><loc>https://example.com/a.xml</loc><lastmod>2024-01-01</lastmod></sitemap>
+      <sitemap><loc>https://example.com/b.xml</loc><lastmod>2024-01-01</lastmod></sitemap>
+    </sitemapindex>"""
+    documents = {
+        "https://example.com/sitemap.xml": index,
+        "https://example.com/a.xml": _urlset("https://example.com/a1"),
+        "https://example.com/b.xml": _urlset("https://example.com/b1"),
+    }
+    fetched = patch_fetch(monkeypatch, documents, {})
+    cache = SitemapCache(tmp_path)
+
+    def discover():
+        parser = GenericSitemapParser("https://example.com/sitemap.xml", cache=cache)
+        return asyncio.run(parser.get_recipe_urls()), parser.fetch_stats
+
+    first_urls, _ = discover()
+    documents["https://example.com/sitemap.xml"] = index.replace(
+        "b.xml</loc><lastmod>2024-01-01", "b.xml</loc><lastmod>2024-03-01"
+    )
+    documents["https://example.com/b.xml"] = _urlset("https://example.com/b2")
+    fetched.clear()
+    second_urls, stats = discover()
+
+    assert first_urls == ["https://example.com/a1", "https://example.com/b1"]
+    assert second_urls == ["https://example.com/a1", "https://example.com/b2"]
+    assert fetched == ["https://example.com/sitemap.xml", "https://example.com/b.xml"]
+    assert stats.cache_hits == 1
+
+
+def test_fetch_sitemap_streams_gzip_bodies_detected_by_magic_bytes():
+    xml = _urlset("https://example.com/a1", "https://example.com/a2")
+    body = gzip.compress(xml[:40].encode()) + gzip.compress(xml[40:].encode())
+    response = FakeResponse(200, body, chunk_size=1)
+    session = FakeSession({"https://example.com/recipes": response})
+    parser = GenericSitemapParser("https://example.com/recipes")
+
+    document = asyncio.run(parser._fetch_sitemap("https://example.com/recipes", session))
+
+    assert [loc for _, loc, _ in document.entries] == [
+        "https://example.com/a1",
+        "https://example.com/a2",
+    ]
+    assert response.closed
+
+
+def test_fetch_sitemap_treats_decoded_gz_urls_as_plain_xml():
+    response = FakeResponse(
+        200,
+        _urlset("https://example.com/a1"),
+        headers={"content-type": "application/x-gzip"},
+    )
+    session = FakeSession({"https://example.com/sitemap.xml.gz": response})
+    parser = GenericSitemapParser("https://example.com/sitemap.xml.gz")
+
+    document = asyncio.run(
+        parser._fetch_sitemap("https://example.com/sitemap.xml.gz", session)
+    )
+
+    assert document.entries == [("url", "https://example.com/a1", None)]
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://example.com/recipes/pasta_1",
+        "  http://example.com/a/b?x=1#frag\n",
+        "https://example.com",
+        "https://example.com?x=/y",
+        "https://example.com/a;params/b;p?q",
+        "https://example.com/a#b?c",
+        "https://user@example.com:8080/a/b",
+        "https://example.com/a\tb",
+        "/relative/path?x",
+        "ftp://example.com/file",
+    ],
+)
+def test_url_path_matches_urlparse(url):
+    assert url_path(url) == urlparse(url.strip()).path
+
+
+@pytest.mark.parametrize(
+    ("url", "parser_class"),
+    [
+        ("https://www.bbc.co.uk/food/sitemap.xml", BBCSitemapParser),
+        ("https://cooking.nytimes.com/sitemap.xml", NYTCookingSitemapParser),
+        ("cooking.nytimes.com", NYTCookingSitemapParser),
+        ("https://NYTimes.com:443/sitemap.xml", NYTCookingSitemapParser),
+        ("https://notnytimes.com/sitemap.xml", GenericSitemapParser),
+        ("https://example.com/sitemap.xml", GenericSitemapParser),
+    ],
+)
+def test_parser_class_for_resolves_parent_domains(url, parser_class):
+    assert SitemapParserFactory.parser_class_for(url) is parser_class
+
+
+def test_matcher_is_shared_and_filters_urls():
+    matcher = SitemapParserFactory.matcher_for("https://www.bbc.co.uk/food")
+    parser = BBCSitemapParser("https://www.bbc.co.uk/food/sitemap.xml")
+
+    assert parser.url_matcher is matcher
+    assert matcher.filter(
+        [
+            "https://www.bbc.co.uk/food/recipes/pasta_123",
+            "https://www.bbc.co.uk/food/recipes/pasta_123?page=2",
+            "https://www.bbc.co.uk/food/ingredients/tomato",
+        ]
+    ) == [
+        "https://www.bbc.co.uk/food/recipes/pasta_123",
+        "https://www.bbc.co.uk/food/recipes/pasta_123?page=2",
+    ]